@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sources.arxiv_backfill import backfill
+from sources.arxiv_fetcher import ArxivFetcher
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="从本地arXiv元数据转储(JSON Lines / OAI-PMH XML, 支持.gz)批量回填论文库"
+    )
+    parser.add_argument("paths", nargs="+", help="转储文件路径")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument(
+        "--all-categories", action="store_true", help="不按arxiv.categories过滤"
+    )
+    parser.add_argument("--no-index", action="store_true", help="回填后不更新BM25索引")
+    args = parser.parse_args()
+
+    fetcher = ArxivFetcher(args.config)
+    categories = [] if args.all_categories else fetcher.categories
+    print(f"回填论文库: {fetcher.store.db_file}")
+    if categories:
+        print(f"  分类过滤: {', '.join(categories)}")
+
+    backfill(args.paths, fetcher.store, categories, batch_size=args.batch_size)
+
+    if not args.no_index:
+        start = time.perf_counter()
+        indexed = fetcher.index.sync()
+        print(f"  索引更新: {indexed} 篇 ({time.perf_counter() - start:.1f}s)")
+    print(f"  论文库共 {fetcher.store.count()} 篇")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as digest
+from http_client import get_http_client
+from replay import ReplayArchive, archive_path, replaying
+
+
+def run_once(archive: ReplayArchive, args, seed: int):
+    output = io.StringIO()
+    get_http_client().clear()
+    with replaying(
+        archive,
+        latency=args.latency,
+        time_scale=args.time_scale,
+        error_rate=args.error_rate,
+        seed=seed,
+    ) as server:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            success = digest.main()
+        elapsed = time.perf_counter() - start
+    return elapsed, success, dict(server.stats), output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基于录制存档的离线端到端基准")
+    parser.add_argument("name", help="存档名(data/fixtures/下)或路径")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="输出每次运行的日志")
+    args = parser.parse_args()
+
+    archive = ReplayArchive(archive_path(args.name)).load()
+    print(f"存档: {archive.path} ({archive.summary()})")
+
+    timings = []
+    for run in range(args.runs):
+        elapsed, success, stats, log = run_once(archive, args, args.seed)
+        timings.append(elapsed)
+        if args.verbose:
+            print(log)
+        print(
+            f"第{run + 1}次: {elapsed:6.2f}s | 推送 {'成功' if success else '失败'} | "
+            f"命中 {stats['served']} 缺失 {stats['misses']} 注入错误 {stats['errors']}"
+        )
+
+    print(
+        f"\n耗时 中位数 {statistics.median(timings):.2f}s | "
+        f"最小 {min(timings):.2f}s | 最大 {max(timings):.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
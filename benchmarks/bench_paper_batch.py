@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_generator import LLMGenerator
+from sources.arxiv_fetcher import ArxivFetcher
+
+
+def load_papers(config_path: str, count: int, days: int):
+    fetcher = ArxivFetcher(config_path)
+    since = datetime.now() - timedelta(days=days)
+    papers = fetcher.store.papers_since(since)[:count]
+    for paper in papers:
+        paper.setdefault("matched_keywords", [])
+    return papers
+
+
+def run(generator: LLMGenerator, papers, batched: bool):
+    generator.batch_analysis = batched
+    generator.usage = []
+    start = time.perf_counter()
+    results = generator.analyze_papers(papers, max_papers=len(papers))
+    elapsed = time.perf_counter() - start
+
+    valid = sum(1 for item in results if generator._is_valid_analysis(item["analysis"]))
+    return {
+        "calls": len(generator.usage),
+        "input_tokens": sum(u["input_tokens"] for u in generator.usage),
+        "output_tokens": sum(u["output_tokens"] for u in generator.usage),
+        "call_seconds": sum(u["latency"] for u in generator.usage),
+        "wall_seconds": elapsed,
+        "valid": valid,
+    }
+
+
+def report(name: str, stats, count: int):
+    print(
+        f"{name:<6} 调用 {stats['calls']:>2} 次 | "
+        f"输入 {stats['input_tokens'] / count:7.0f} tok/篇 | "
+        f"输出 {stats['output_tokens'] / count:7.0f} tok/篇 | "
+        f"模型耗时 {stats['call_seconds'] / count:5.1f} s/篇 | "
+        f"墙钟 {stats['wall_seconds']:5.1f} s | 有效 {stats['valid']}/{count}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="单篇 vs 批量论文分析: token与延迟对比"
+    )
+    parser.add_argument("--papers", type=int, default=6)
+    parser.add_argument("--batch-size", type=int, default=3)
+    parser.add_argument(
+        "--days", type=int, default=7, help="从本地论文库取最近N天的论文"
+    )
+    parser.add_argument("--config", default="config.yaml")
+    args = parser.parse_args()
+
+    papers = load_papers(args.config, args.papers, args.days)
+    if not papers:
+        print("本地论文库为空, 请先运行 main.py 或 backfill_papers.py")
+        return
+
+    generator = LLMGenerator(args.config)
+    generator.cache = None
+    generator.batch_size = args.batch_size
+
+    print(f"论文 {len(papers)} 篇, 批大小 {args.batch_size}")
+    single = run(generator, papers, batched=False)
+    batched = run(generator, papers, batched=True)
+    report("单篇", single, len(papers))
+    report("批量", batched, len(papers))
+
+    if single["input_tokens"]:
+        saved = 1 - batched["input_tokens"] / single["input_tokens"]
+        print(f"输入token节省 {saved * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+
+DATA_DIR_ENV = "DIGEST_DATA_DIR"
+
+
+def get_data_dir(base_dir: str) -> str:
+    return os.environ.get(DATA_DIR_ENV) or os.path.join(base_dir, "data")
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import requests
+import yaml
+import metrics
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+VARY_HEADERS = (
+    "accept",
+    "authorization",
+    "if-modified-since",
+    "if-none-match",
+    "range",
+)
+
+
+def _get_config_path(config_path: str = "config.yaml") -> str:
+    if os.path.isabs(config_path):
+        return config_path
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(project_root, config_path)
+
+
+class HttpClient:
+    def __init__(
+        self,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        backoff_factor: float = 0.5,
+    ):
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._results: Dict[Hashable, Any] = {}
+
+    def coalesce(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        with self._lock:
+            if key in self._results:
+                metrics.count("http.coalesced")
+                return self._results[key]
+            future = self._inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not is_owner:
+            metrics.count("http.coalesced")
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            if cacheable is None or cacheable(result):
+                self._results[key] = result
+            del self._inflight[key]
+        future.set_result(result)
+        return result
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        coalesce: bool = True,
+        **kwargs,
+    ) -> requests.Response:
+        if not coalesce or kwargs.get("stream"):
+            return self._request("GET", url, params=params, **kwargs)
+
+        headers = {
+            name.lower(): value
+            for name, value in (kwargs.get("headers") or {}).items()
+            if name.lower() in VARY_HEADERS
+        }
+        key = (
+            "GET",
+            url,
+            tuple(sorted((params or {}).items())),
+            tuple(sorted(headers.items())),
+        )
+        return self.coalesce(
+            key,
+            lambda: self._read(self._request("GET", url, params=params, **kwargs)),
+            cacheable=lambda response: response.status_code < 400,
+        )
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self._request("POST", url, **kwargs)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        metrics.count("http.requests")
+        stream = kwargs.get("stream")
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            metrics.count("http.errors")
+            raise
+        finally:
+            metrics.count(
+                "http.seconds_to_headers" if stream else "http.seconds",
+                time.perf_counter() - start,
+            )
+
+        if response.status_code >= 400:
+            metrics.count("http.errors")
+        if not stream:
+            metrics.count("http.bytes", len(response.content))
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    @staticmethod
+    def _read(response: requests.Response) -> requests.Response:
+        response.content
+        return response
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client(config_path: str = "config.yaml") -> HttpClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            http_config = {}
+            config_file = _get_config_path(config_path)
+            if os.path.exists(config_file):
+                with open(config_file, "r", encoding="utf-8") as f:
+                    http_config = (yaml.safe_load(f) or {}).get("http", {})
+            _client = HttpClient(
+                pool_size=http_config.get("pool_size", 10),
+                max_retries=http_config.get("max_retries", 2),
+                backoff_factor=http_config.get("backoff_factor", 0.5),
+            )
+        return _client
@@ -5,6 +5,8 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Dict
 import yaml
 
+from data_paths import get_data_dir
+
 
 class KnowledgeManager:
     def __init__(self, config_path: str = "config.yaml"):
@@ -22,7 +24,7 @@ class KnowledgeManager:
         self.categories = self.knowledge_config.get("categories", {})
         self.max_history_days = self.knowledge_config.get("max_history_days", 60)
 
-        self.data_dir = os.path.join(self.config_dir, "data")
+        self.data_dir = get_data_dir(self.config_dir)
         os.makedirs(self.data_dir, exist_ok=True)
 
         self.history_file = os.path.join(self.data_dir, "knowledge_history.json")
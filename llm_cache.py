@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class LLMCache:
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_bytes: int = 50 * 1024 * 1024,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._entries: Dict[str, tuple] = {}
+        for root, _, files in os.walk(cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    self._entries[path] = (st.st_mtime, st.st_size)
+        self._total_bytes = sum(size for _, size in self._entries.values())
+
+    @staticmethod
+    def make_key(model: str, template: str, prompt: str, params: Dict) -> str:
+        payload = json.dumps(
+            {"model": model, "template": template, "prompt": prompt, "params": params},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _drop(self, path: str):
+        _, size = self._entries.pop(path, (0, 0))
+        self._total_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _read(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        if path not in self._entries:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._drop(path)
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._drop(path)
+            return None
+
+        now = time.time()
+        os.utime(path, (now, now))
+        self._entries[path] = (now, self._entries[path][1])
+        return entry["response"]
+
+    def get(self, *keys: str) -> Optional[str]:
+        with self._lock:
+            for key in keys:
+                response = self._read(key)
+                if response is not None:
+                    self.stats["hits"] += 1
+                    return response
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, response: str, model: str = ""):
+        path = self._path(key)
+        entry = {
+            "model": model,
+            "created_at": time.time(),
+            "response": response,
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_file = path + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_file, path)
+
+            _, old_size = self._entries.get(path, (0, 0))
+            size = os.path.getsize(path)
+            self._entries[path] = (time.time(), size)
+            self._total_bytes += size - old_size
+            self.stats["writes"] += 1
+            self._evict()
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for path, _ in sorted(self._entries.items(), key=lambda x: x[1][0]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._drop(path)
+            self.stats["evictions"] += 1
+
+    def summary(self) -> str:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        rate = self.stats["hits"] / lookups * 100 if lookups else 0
+        return (
+            f"命中 {self.stats['hits']}/{lookups} ({rate:.0f}%), "
+            f"写入 {self.stats['writes']}, 淘汰 {self.stats['evictions']}, "
+            f"占用 {self._total_bytes / 1024:.0f} KB / {len(self._entries)} 条"
+        )
@@ -1,15 +1,40 @@
 import os
+import queue
+import re
+import threading
 import time
 import yaml
 import requests
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Dict, Optional, Tuple
 import dashscope
 from dashscope import Generation
 
+import metrics
+from data_paths import get_data_dir
 from knowledge_manager import KnowledgeManager
+from llm_cache import LLMCache
+from model_health import FORMATS, ModelHealth
+from rate_limiter import RateLimiter
+from prompt_builder import PromptBuilder, estimate_tokens, truncate_to_tokens
 from sources.image_searcher import search_images_for_topic
 
 
+class DeadlineExceeded(Exception):
+    pass
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class Throttled(Exception):
+    pass
+
+
+PAPER_SECTIONS = ["主题分类", "核心关键词", "方法概括", "通俗版解释", "专业版解释"]
+
+
 class LLMGenerator:
     def __init__(self, config_path: str = "config.yaml"):
         if os.path.isabs(config_path):
@@ -28,10 +53,75 @@ class LLMGenerator:
             "api_key", ""
         )
         self.timeout = llm_config.get("timeout", 60)
+        stream_config = llm_config.get("streaming", {})
+        self.streaming = stream_config.get("enabled", True)
+        self.ttft_timeout = stream_config.get("ttft_timeout", 30)
+        self.max_concurrency = max(1, llm_config.get("max_concurrency", 4))
+
+        hedge_config = llm_config.get("hedging", {})
+        self.hedging = hedge_config.get("enabled", False)
+        self.hedge_percentile = hedge_config.get("percentile", 90)
+        self.hedge_min_samples = hedge_config.get("min_samples", 5)
+        self.hedge_default_delay = hedge_config.get("default_delay", 20)
+        self.hedge_max_extra_calls = hedge_config.get("max_extra_calls", 3)
+        self.hedged_calls = 0
+        self._hedge_lock = threading.Lock()
+        self._call_slots = threading.BoundedSemaphore(self.max_concurrency)
 
         self.models = llm_config.get("models", [])
         self.models.sort(key=lambda x: x.get("priority", 999))
 
+        rate_config = llm_config.get("rate_limit", {})
+        self.rate_limiter = None
+        self.throttle_retries = rate_config.get("throttle_retries", 3)
+        if rate_config.get("enabled", True):
+            self.rate_limiter = RateLimiter(
+                self.models,
+                rpm=rate_config.get("rpm", 60),
+                burst=rate_config.get("burst", 5),
+                max_concurrency=rate_config.get(
+                    "max_concurrency", self.max_concurrency
+                ),
+                backoff=rate_config.get("backoff", 2),
+            )
+        self.generation_params = {"max_tokens": 2000, "temperature": 0.7, "top_p": 0.8}
+        self.usage: List[Dict] = []
+
+        budget_config = llm_config.get("prompt_budget", {})
+        default_budget = budget_config.get("max_input_tokens", 6000)
+        self.prompt_builder = PromptBuilder(
+            min(
+                [m.get("max_input_tokens", default_budget) for m in self.models]
+                or [default_budget]
+            ),
+            min_item_tokens=budget_config.get("min_item_tokens", 30),
+        )
+        self.news_item_tokens = budget_config.get("news_item_tokens", 150)
+        self.max_keywords = budget_config.get("max_keywords", 5)
+
+        batch_config = llm_config.get("batch_analysis", {})
+        self.batch_analysis = batch_config.get("enabled", False)
+        self.batch_size = max(1, batch_config.get("batch_size", 3))
+
+        health_config = llm_config.get("health", {})
+        self.health = None
+        if health_config.get("enabled", True):
+            self.health = ModelHealth(
+                os.path.join(get_data_dir(self.project_dir), "model_health.json"),
+                failure_threshold=health_config.get("failure_threshold", 3),
+                cooldown_seconds=health_config.get("cooldown_minutes", 30) * 60,
+                latency_alpha=health_config.get("latency_alpha", 0.3),
+            )
+
+        cache_config = llm_config.get("cache", {})
+        self.cache = None
+        if cache_config.get("enabled", True):
+            self.cache = LLMCache(
+                os.path.join(get_data_dir(self.project_dir), "llm_cache"),
+                ttl_seconds=cache_config.get("ttl_hours", 168) * 3600,
+                max_bytes=cache_config.get("max_size_mb", 50) * 1024 * 1024,
+            )
+
         dashscope.api_key = self.api_key
 
         self.prompts_dir = os.path.join(self.project_dir, "prompts")
@@ -47,36 +137,167 @@ class LLMGenerator:
         with open(prompt_path, "r", encoding="utf-8") as f:
             return f.read()
 
+    def _record_usage(
+        self,
+        model_name: str,
+        result_format: str,
+        usage,
+        latency: float,
+        ttft: Optional[float] = None,
+        tokens_per_sec: Optional[float] = None,
+    ):
+        usage = usage or {}
+        metrics.count("llm.calls")
+        metrics.count("llm.input_tokens", usage.get("input_tokens", 0))
+        metrics.count("llm.output_tokens", usage.get("output_tokens", 0))
+        self.usage.append(
+            {
+                "model": model_name,
+                "input_tokens": usage.get("input_tokens", 0),
+                "output_tokens": usage.get("output_tokens", 0),
+                "latency": latency,
+                "ttft": ttft,
+                "tokens_per_sec": tokens_per_sec,
+            }
+        )
+        if self.health:
+            self.health.record_success(
+                model_name, result_format, latency, ttft, tokens_per_sec
+            )
+
+    def _error_message(self, response) -> str:
+        error_code = getattr(response, "code", None) or "unknown"
+        error_msg = getattr(response, "message", str(response))
+        if response.status_code == 429 or str(error_code).startswith("Throttling"):
+            raise Throttled(f"{error_code} - {error_msg}")
+        return f"{error_code} - {error_msg}"
+
+    def _response_text(self, response, use_message_format: bool) -> str:
+        if use_message_format:
+            return response.output.choices[0].message.content or ""
+        return response.output.text or ""
+
+    def _stream_with_format(
+        self,
+        model_name: str,
+        kwargs: Dict,
+        use_message_format: bool,
+        started: Optional[threading.Event] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> tuple:
+        chunks: queue.Queue = queue.Queue()
+        cancelled = cancelled or threading.Event()
+
+        def pump():
+            try:
+                for response in Generation.call(
+                    stream=True, incremental_output=True, **kwargs
+                ):
+                    chunks.put(("chunk", response))
+                    if cancelled.is_set():
+                        return
+                chunks.put(("done", None))
+            except Exception as e:
+                chunks.put(("error", e))
+
+        start = time.perf_counter()
+        threading.Thread(target=pump, daemon=True).start()
+
+        parts = []
+        usage = None
+        first_token_at = None
+        while True:
+            if first_token_at is None:
+                deadline = start + min(self.ttft_timeout, self.timeout)
+            else:
+                deadline = start + self.timeout
+            remaining = deadline - time.perf_counter()
+            try:
+                kind, response = chunks.get(timeout=max(0.0, min(remaining, 0.2)))
+            except queue.Empty:
+                if cancelled.is_set():
+                    raise RequestCancelled()
+                if remaining > 0.2:
+                    continue
+                cancelled.set()
+                if first_token_at is None:
+                    raise DeadlineExceeded(f"首token超时 ({self.ttft_timeout}s)")
+                raise DeadlineExceeded(f"生成超时 ({self.timeout}s)")
+            if cancelled.is_set():
+                raise RequestCancelled()
+
+            if kind == "error":
+                raise response
+            if kind == "done":
+                break
+            if response.status_code != 200:
+                cancelled.set()
+                return False, self._error_message(response)
+
+            text = self._response_text(response, use_message_format)
+            if text:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    if started:
+                        started.set()
+                parts.append(text)
+            usage = getattr(response, "usage", None) or usage
+
+        end = time.perf_counter()
+        if first_token_at is None:
+            return False, "空响应"
+
+        output_tokens = (usage or {}).get("output_tokens") or len(parts)
+        generation_time = end - first_token_at
+        self._record_usage(
+            model_name,
+            kwargs["result_format"],
+            usage,
+            end - start,
+            ttft=first_token_at - start,
+            tokens_per_sec=(
+                output_tokens / generation_time if generation_time > 0 else None
+            ),
+        )
+        return True, "".join(parts)
+
     def _call_with_format(
-        self, model_name: str, prompt: str, use_message_format: bool
+        self,
+        model_name: str,
+        prompt: str,
+        use_message_format: bool,
+        params: Dict,
+        started: Optional[threading.Event] = None,
+        cancelled: Optional[threading.Event] = None,
     ) -> tuple:
+        kwargs = dict(params, model=model_name, request_timeout=self.timeout)
+        if use_message_format:
+            kwargs["messages"] = [{"role": "user", "content": prompt}]
+            kwargs["result_format"] = "message"
+        else:
+            kwargs["prompt"] = prompt
+            kwargs["result_format"] = "text"
+
+        start = time.perf_counter()
         try:
-            if use_message_format:
-                response = Generation.call(
-                    model=model_name,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=2000,
-                    temperature=0.7,
-                    top_p=0.8,
-                    result_format="message",
+            if self.streaming:
+                return self._stream_with_format(
+                    model_name, kwargs, use_message_format, started, cancelled
                 )
-                if response.status_code == 200:
-                    return True, response.output.choices[0].message.content
-            else:
-                response = Generation.call(
-                    model=model_name,
-                    prompt=prompt,
-                    max_tokens=2000,
-                    temperature=0.7,
-                    top_p=0.8,
-                    result_format="text",
+
+            response = Generation.call(**kwargs)
+            if response.status_code == 200:
+                self._record_usage(
+                    model_name,
+                    kwargs["result_format"],
+                    getattr(response, "usage", None),
+                    time.perf_counter() - start,
                 )
-                if response.status_code == 200:
-                    return True, response.output.text
+                return True, self._response_text(response, use_message_format)
 
-            error_code = getattr(response, "code", "unknown")
-            error_msg = getattr(response, "message", str(response))
-            return False, f"{error_code} - {error_msg}"
+            return False, self._error_message(response)
+        except (DeadlineExceeded, RequestCancelled, Throttled):
+            raise
         except requests.exceptions.Timeout:
             return False, "请求超时"
         except requests.exceptions.ConnectionError:
@@ -84,37 +305,261 @@ class LLMGenerator:
         except Exception as e:
             return False, str(e)[:100]
 
-    def _call_qwen(self, prompt: str) -> str:
+    def _cache_key(
+        self, model_name: str, template: str, prompt: str, params: Dict
+    ) -> str:
+        return LLMCache.make_key(model_name, template, prompt, params)
+
+    def _call_qwen(
+        self,
+        prompt: str,
+        template: str = "",
+        params: Optional[Dict] = None,
+        cacheable: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        with metrics.span("llm.call", prompt_tokens=estimate_tokens(prompt)):
+            return self._call_cached(prompt, template, params, cacheable)
+
+    def _call_cached(
+        self,
+        prompt: str,
+        template: str = "",
+        params: Optional[Dict] = None,
+        cacheable: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        params = {**self.generation_params, **(params or {})}
+        if self.cache:
+            cached = self.cache.get(
+                *[
+                    self._cache_key(
+                        m.get("name", "qwen-plus"), template, prompt, params
+                    )
+                    for m in self.models
+                ]
+            )
+            if cached is not None and (cacheable is None or cacheable(cached)):
+                print("      命中缓存")
+                metrics.count("llm.cache_hits")
+                return cached
+            metrics.count("llm.cache_misses")
+
         if not self.api_key or self.api_key.startswith("YOUR_"):
             print("      错误: 请在config.yaml中配置api_key")
             return ""
 
-        for i, model_config in enumerate(self.models):
-            model_name = model_config.get("name", "qwen-plus")
-            print(f"      尝试模型 [{i + 1}/{len(self.models)}]: {model_name}")
-
-            success, result = self._call_with_format(
-                model_name, prompt, use_message_format=True
-            )
+        with self._call_slots:
+            return self._call_models(prompt, template, params, cacheable)
+
+    def _model_chain(self) -> List[Dict]:
+        if not self.health:
+            return self.models
+
+        ordered = self.health.order(self.models)
+        available = [
+            m for m in ordered if self.health.is_available(m.get("name", "qwen-plus"))
+        ]
+        if len(available) < len(ordered):
+            print(f"      跳过熔断中的模型 {len(ordered) - len(available)} 个")
+        return available or ordered
+
+    def _try_model(
+        self,
+        model_name: str,
+        prompt: str,
+        params: Dict,
+        started: Optional[threading.Event] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Optional[str]:
+        formats = self.health.formats(model_name) if self.health else FORMATS
+        for result_format in formats:
+            try:
+                success, result = self._limited_call(
+                    model_name, prompt, result_format, params, started, cancelled
+                )
+            except RequestCancelled:
+                return None
+            except Throttled:
+                print(f"        {model_name} 持续限流, 换下一个模型")
+                return None
+            except DeadlineExceeded as e:
+                print(f"        {e}, 放弃该模型")
+                break
+            if cancelled and cancelled.is_set():
+                return None
             if success:
                 print(f"      成功: {model_name}")
                 return result
 
-            print(f"        message格式失败: {result[:60]}")
-
-            success, result = self._call_with_format(
-                model_name, prompt, use_message_format=False
+            print(f"        {result_format}格式失败: {result[:60]}")
+
+        metrics.count("llm.model_failures")
+        if self.health:
+            self.health.record_failure(model_name)
+        return None
+
+    def _limited_call(
+        self,
+        model_name: str,
+        prompt: str,
+        result_format: str,
+        params: Dict,
+        started: Optional[threading.Event] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> tuple:
+        for attempt in range(self.throttle_retries + 1):
+            if self.rate_limiter and not self.rate_limiter.acquire(
+                model_name, cancelled
+            ):
+                raise RequestCancelled()
+
+            outcome = "failure"
+            try:
+                success, result = self._call_with_format(
+                    model_name,
+                    prompt,
+                    use_message_format=result_format == "message",
+                    params=params,
+                    started=started,
+                    cancelled=cancelled,
+                )
+                outcome = "success" if success else "failure"
+                return success, result
+            except Throttled as e:
+                outcome = "throttled"
+                metrics.count("llm.throttled")
+                if attempt == self.throttle_retries:
+                    raise
+                print(f"        {model_name} 被限流 ({e}), 第{attempt + 1}次重试")
+                if not self.rate_limiter:
+                    time.sleep(2**attempt)
+            finally:
+                if self.rate_limiter:
+                    self.rate_limiter.release(model_name, outcome)
+
+    def _hedge_delay(self, model_name: str) -> float:
+        if self.health:
+            field = "ttft" if self.streaming else "latency"
+            delay = self.health.percentile(
+                model_name, field, self.hedge_percentile, self.hedge_min_samples
             )
-            if success:
-                print(f"      成功: {model_name}")
-                return result
-
-            print(f"        text格式失败: {result[:60]}")
-
-            time.sleep(1)
+            if delay is not None:
+                return delay
+        return self.hedge_default_delay
+
+    def _reserve_hedge(self) -> bool:
+        with self._hedge_lock:
+            if self.hedged_calls >= self.hedge_max_extra_calls:
+                return False
+            self.hedged_calls += 1
+            return True
+
+    def _call_hedged(
+        self, models: List[Dict], prompt: str, params: Dict
+    ) -> Tuple[str, str]:
+        executor = ThreadPoolExecutor(max_workers=len(models))
+        running = {}
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            model_name = models[next_index].get("name", "qwen-plus")
+            print(f"      尝试模型 [{next_index + 1}/{len(models)}]: {model_name}")
+            metrics.count("llm.attempts")
+            if next_index:
+                metrics.count("llm.fallbacks")
+            started, cancelled = threading.Event(), threading.Event()
+            future = executor.submit(
+                metrics.propagate(self._try_model),
+                model_name,
+                prompt,
+                params,
+                started,
+                cancelled,
+            )
+            running[future] = (model_name, started, cancelled, time.perf_counter())
+            next_index += 1
 
-        print("      所有模型均调用失败!")
-        return ""
+        try:
+            launch()
+            hedge_open = True
+            while running:
+                latest = max(running.values(), key=lambda x: x[3])
+                timeout = None
+                if hedge_open and next_index < len(models) and not latest[1].is_set():
+                    delay = self._hedge_delay(latest[0])
+                    timeout = max(0.0, latest[3] + delay - time.perf_counter())
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    if latest[1].is_set():
+                        continue
+                    if self._reserve_hedge():
+                        print(
+                            f"        {latest[0]} 超过P{self.hedge_percentile}延迟未响应, "
+                            "对冲请求下一个模型"
+                        )
+                        metrics.count("llm.hedges")
+                        launch()
+                    else:
+                        hedge_open = False
+                    continue
+
+                for future in done:
+                    model_name = running.pop(future)[0]
+                    result = future.result()
+                    if result:
+                        return model_name, result
+                if not running and next_index < len(models):
+                    launch()
+            return "", ""
+        finally:
+            for _, _, cancelled, _ in running.values():
+                cancelled.set()
+            executor.shutdown(wait=False)
+
+    def _call_models(
+        self,
+        prompt: str,
+        template: str,
+        params: Dict,
+        cacheable: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        models = self._model_chain()
+        try:
+            if self.hedging and len(models) > 1:
+                model_name, result = self._call_hedged(models, prompt, params)
+            else:
+                model_name, result = "", ""
+                for i, model_config in enumerate(models):
+                    model_name = model_config.get("name", "qwen-plus")
+                    print(f"      尝试模型 [{i + 1}/{len(models)}]: {model_name}")
+                    metrics.count("llm.attempts")
+                    if i:
+                        metrics.count("llm.fallbacks")
+                    result = self._try_model(model_name, prompt, params)
+                    if result:
+                        break
+                    time.sleep(1)
+
+            if not result:
+                print("      所有模型均调用失败!")
+                return ""
+            if cacheable is None or cacheable(result):
+                self._store(model_name, template, prompt, params, result)
+            return result
+        finally:
+            if self.health:
+                self.health.save()
+
+    def _store(
+        self, model_name: str, template: str, prompt: str, params: Dict, result: str
+    ):
+        if self.cache and result:
+            self.cache.put(
+                self._cache_key(model_name, template, prompt, params),
+                result,
+                model=model_name,
+            )
 
     def summarize_news(self, news_items: List[Dict]) -> str:
         if not news_items:
@@ -122,35 +567,155 @@ class LLMGenerator:
 
         prompt_template = self._load_prompt("news_summary.txt")
 
-        news_text = ""
-        for i, item in enumerate(news_items, 1):
-            news_text += f"\n{i}. [{item.get('source', '未知来源')}]\n"
-            news_text += f"   标题: {item.get('title', '')}\n"
-            news_text += f"   摘要: {item.get('summary', '')[:200]}\n"
+        def render(item: Dict, limit: Optional[int]) -> str:
+            return (
+                f"[{item.get('source', '未知来源')}]\n"
+                f"   标题: {item.get('title', '')}\n"
+                f"   摘要: {truncate_to_tokens(item.get('summary', ''), limit)}\n"
+            )
+
+        kept, stats = self.prompt_builder.fit_items(
+            news_items,
+            render,
+            score_fn=lambda x: x.get("quality_score", 0),
+            overhead_tokens=self._template_tokens(prompt_template)
+            + estimate_tokens(
+                "".join(f"\n{i}. " for i in range(1, len(news_items) + 1))
+            ),
+            max_item_tokens=self.news_item_tokens,
+        )
+        news_text = "".join(f"\n{i}. {text}" for i, (_, text) in enumerate(kept, 1))
 
         prompt = prompt_template.format(news_items=news_text)
-        return self._call_qwen(prompt)
+        self.prompt_builder.log("新闻摘要", prompt, stats)
+        return self._call_qwen(prompt, template=prompt_template)
 
     def analyze_paper(self, paper: Dict) -> str:
         prompt_template = self._load_prompt("paper_analysis.txt")
 
-        prompt = prompt_template.format(
-            title=paper.get("title", ""),
-            authors=", ".join(paper.get("authors", [])),
-            summary=paper.get("summary", ""),
-            keywords=", ".join(paper.get("matched_keywords", [])),
+        def render(item: Dict, limit: Optional[int]) -> str:
+            return prompt_template.format(
+                title=item.get("title", ""),
+                authors=", ".join(item.get("authors", [])),
+                summary=truncate_to_tokens(item.get("summary", ""), limit),
+                keywords=", ".join(
+                    item.get("matched_keywords", [])[: self.max_keywords]
+                ),
+            )
+
+        kept, stats = self.prompt_builder.fit_items(
+            [paper], render, score_fn=lambda x: 0, overhead_tokens=0
+        )
+        prompt = kept[0][1] if kept else render(paper, 0)
+        self.prompt_builder.log("论文分析", prompt, stats)
+        return self._call_qwen(prompt, template=prompt_template)
+
+    def _template_tokens(self, prompt_template: str) -> int:
+        return estimate_tokens(re.sub(r"\{\w+\}", "", prompt_template))
+
+    def _is_valid_analysis(self, analysis: str) -> bool:
+        return all(f"【{section}】" in analysis for section in PAPER_SECTIONS)
+
+    def _split_batch_analysis(self, text: str, count: int) -> Dict[int, str]:
+        analyses = {}
+        parts = re.split(r"<<<\s*PAPER\s*(\d+)\s*>>>", text)
+        for number, body in zip(parts[1::2], parts[2::2]):
+            index = int(number) - 1
+            body = re.split(r"<<<\s*END\s*\d+\s*>>>", body)[0].strip()
+            if 0 <= index < count and index not in analyses:
+                if self._is_valid_analysis(body):
+                    analyses[index] = body
+        return analyses
+
+    def analyze_paper_batch(self, papers: List[Dict]) -> List[Optional[str]]:
+        prompt_template = self._load_prompt("paper_analysis_batch.txt")
+
+        def render(paper: Dict, limit: Optional[int]) -> str:
+            keywords = paper.get("matched_keywords", [])[: self.max_keywords]
+            return (
+                f"标题：{paper.get('title', '')}\n"
+                f"作者：{', '.join(paper.get('authors', []))}\n"
+                f"摘要：{truncate_to_tokens(paper.get('summary', ''), limit)}\n"
+                f"相关关键词：{', '.join(keywords)}\n"
+            )
+
+        kept, stats = self.prompt_builder.fit_items(
+            papers,
+            render,
+            score_fn=lambda x: x.get("relevance_score", 0),
+            overhead_tokens=self._template_tokens(prompt_template)
+            + estimate_tokens(
+                "".join(f"\n论文 {i}:\n" for i in range(1, len(papers) + 1))
+            ),
+        )
+        if not kept:
+            return [None] * len(papers)
+
+        papers_text = "".join(
+            f"\n论文 {i}:\n{text}" for i, (_, text) in enumerate(kept, 1)
+        )
+        prompt = prompt_template.format(count=len(kept), papers=papers_text)
+        self.prompt_builder.log("批量论文分析", prompt, stats)
+
+        def complete(text: str) -> bool:
+            return len(self._split_batch_analysis(text, len(kept))) == len(kept)
+
+        max_tokens = self.generation_params["max_tokens"] * len(kept)
+        response = self._call_qwen(
+            prompt,
+            template=prompt_template,
+            params={"max_tokens": min(max_tokens, 8000)},
+            cacheable=complete,
         )
 
-        return self._call_qwen(prompt)
+        analyses = self._split_batch_analysis(response, len(kept))
+        by_paper = {id(paper): analyses.get(i) for i, (paper, _) in enumerate(kept)}
+        return [by_paper.get(id(paper)) for paper in papers]
 
     def analyze_papers(self, papers: List[Dict], max_papers: int = 2) -> List[Dict]:
-        results = []
+        papers = papers[:max_papers]
+        if not papers:
+            return []
 
-        for paper in papers[:max_papers]:
-            analysis = self.analyze_paper(paper)
-            results.append({"paper_info": paper, "analysis": analysis})
+        if self.batch_analysis and len(papers) > 1:
+            analyses = self._analyze_papers_batched(papers)
+        else:
+            workers = min(self.max_concurrency, len(papers))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                analyses = list(
+                    executor.map(metrics.propagate(self.analyze_paper), papers)
+                )
+
+        return [
+            {"paper_info": paper, "analysis": analysis}
+            for paper, analysis in zip(papers, analyses)
+        ]
+
+    def _analyze_papers_batched(self, papers: List[Dict]) -> List[str]:
+        batches = [
+            papers[start : start + self.batch_size]
+            for start in range(0, len(papers), self.batch_size)
+        ]
+        workers = min(self.max_concurrency, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            analyses = [
+                analysis
+                for batch in executor.map(
+                    metrics.propagate(self.analyze_paper_batch), batches
+                )
+                for analysis in batch
+            ]
+
+            failed = [i for i, analysis in enumerate(analyses) if analysis is None]
+            if failed:
+                print(f"      批量分析中 {len(failed)} 篇未能解析, 改为单篇分析")
+                retried = executor.map(
+                    metrics.propagate(self.analyze_paper), [papers[i] for i in failed]
+                )
+                for i, analysis in zip(failed, retried):
+                    analyses[i] = analysis
 
-        return results
+        return analyses
 
     def get_random_topic(self) -> str:
         result = self.knowledge_manager.get_topic_with_category()
@@ -165,8 +730,9 @@ class LLMGenerator:
 
         prompt_template = self._load_prompt("knowledge_explain.txt")
         prompt = prompt_template.format(topic=topic)
+        self.prompt_builder.log("知识点讲解", prompt)
 
-        return self._call_qwen(prompt)
+        return self._call_qwen(prompt, template=prompt_template)
 
     def explain_knowledge_with_images(
         self, topic: Optional[str] = None
@@ -176,16 +742,19 @@ class LLMGenerator:
 
         prompt_template = self._load_prompt("knowledge_explain.txt")
         prompt = prompt_template.format(topic=topic)
+        self.prompt_builder.log("知识点讲解", prompt)
 
-        explanation = self._call_qwen(prompt)
+        explanation = self._call_qwen(prompt, template=prompt_template)
+        return explanation, self.search_images(topic)
 
-        images = []
-        if self.image_search_enabled:
-            print("      - 搜索相关图片...")
-            images = search_images_for_topic(topic)
-            print(f"        找到 {len(images)} 张图片")
+    def search_images(self, topic: str) -> List[str]:
+        if not self.image_search_enabled:
+            return []
 
-        return explanation, images
+        print("      - 搜索相关图片...")
+        images = search_images_for_topic(topic)
+        print(f"        找到 {len(images)} 张图片")
+        return images
 
     def get_knowledge_stats(self) -> Dict:
         return self.knowledge_manager.get_history_stats()
@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 
@@ -8,8 +9,16 @@ from sources.arxiv_fetcher import fetch_arxiv_papers
 from sources.news_fetcher import fetch_ai_news
 from llm_generator import LLMGenerator
 from notifier.serverchan import ServerChanNotifier
+import metrics
+from data_paths import get_data_dir
+from pipeline import Pipeline, RunCheckpoint
+from sources.near_dedup import NearDuplicateFilter
+from sources.seen_store import SeenStore
+from sources.interest_profile import InterestProfile
 import yaml
 
+NO_NEWS_SUMMARY = "暂无今日AI要闻"
+
 
 def load_config():
     config_path = os.path.join(os.path.dirname(__file__), "config.yaml")
@@ -17,75 +26,188 @@ def load_config():
         return yaml.safe_load(f)
 
 
-def main():
-    print("=" * 60)
-    print(f"  AI每日速递 - 开始运行 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 60)
-
-    config = load_config()
-    date_str = datetime.now().strftime("%Y-%m-%d")
-
-    print("\n[1/5] 抓取AI新闻...")
+def fetch_news():
+    print("\n[新闻] 抓取AI新闻...")
     try:
         news = fetch_ai_news()
         print(f"      获取到 {len(news)} 条新闻")
+        return news
     except Exception as e:
         print(f"      新闻抓取失败: {e}")
-        news = []
+        return []
+
 
-    print("\n[2/5] 抓取arXiv论文...")
+def fetch_papers():
+    print("\n[论文] 抓取arXiv论文...")
     try:
         papers = fetch_arxiv_papers()
         print(f"      获取到 {len(papers)} 篇论文")
+        return papers
     except Exception as e:
         print(f"      论文抓取失败: {e}")
-        papers = []
+        return []
 
-    print("\n[3/5] 生成内容摘要...")
-    generator = LLMGenerator()
 
+def create_generator():
+    generator = LLMGenerator()
     stats = generator.get_knowledge_stats()
     print(
         f"      知识点库: 剩余 {stats['remaining_topics']}/{stats['total_topics']} 个主题未使用"
     )
+    return generator
 
-    print("      - 生成新闻摘要...")
-    news_summary = generator.summarize_news(news) if news else "暂无今日AI要闻"
 
-    print("      - 分析论文...")
-    paper_count = config.get("content", {}).get("paper_count", 2)
-    analyzed_papers = generator.analyze_papers(papers, max_papers=paper_count)
-
-    print("      - 选择今日知识点...")
+def select_topic(generator):
+    print("\n[知识点] 选择今日知识点...")
     topic_info = generator.get_topic_with_category()
-    topic = topic_info["topic"]
-    category = topic_info["category"]
-    print(f"        分类: {category}")
-    print(f"        主题: {topic}")
+    print(f"        分类: {topic_info['category']}")
+    print(f"        主题: {topic_info['topic']}")
+    return topic_info
+
 
-    print("      - 生成知识点解释...")
-    knowledge, images = generator.explain_knowledge_with_images(topic)
+def summarize_news(news, generator):
+    if not news:
+        return NO_NEWS_SUMMARY
+    print("\n[新闻摘要] 生成新闻摘要...")
+    return generator.summarize_news(news)
 
-    print("\n[4/5] 推送到微信...")
+
+def explain_topic(topic, generator):
+    print("\n[知识点] 生成知识点解释...")
+    return generator.explain_knowledge(topic["topic"])
+
+
+def build_pipeline(config, checkpoint=None, resume: bool = False) -> Pipeline:
+    paper_count = config.get("content", {}).get("paper_count", 2)
+
+    pipeline = Pipeline(checkpoint=checkpoint, resume=resume)
+    pipeline.add("news", fetch_news, checkpoint=True)
+    pipeline.add("papers", fetch_papers, checkpoint=True)
+    pipeline.add("generator", create_generator)
+    pipeline.add("topic", select_topic, inputs=["generator"], checkpoint=True)
+    pipeline.add(
+        "news_summary",
+        summarize_news,
+        inputs=["news", "generator"],
+        checkpoint=lambda summary: bool(summary) and summary != NO_NEWS_SUMMARY,
+    )
+    pipeline.add(
+        "paper_analysis",
+        lambda papers, generator: generator.analyze_papers(
+            papers, max_papers=paper_count
+        ),
+        inputs=["papers", "generator"],
+        checkpoint=lambda analyses: bool(analyses)
+        and all(item["analysis"] for item in analyses),
+    )
+    pipeline.add(
+        "knowledge", explain_topic, inputs=["topic", "generator"], checkpoint=True
+    )
+    pipeline.add(
+        "images",
+        lambda topic, generator: generator.search_images(topic["topic"]),
+        inputs=["topic", "generator"],
+        checkpoint=True,
+    )
+    return pipeline
+
+
+def push_digest(date_str, results) -> bool:
+    generator = results["generator"]
+    if generator.cache:
+        print(f"      LLM缓存: {generator.cache.summary()}")
+    if generator.health:
+        print(f"      模型状态: {generator.health.summary()}")
+    if generator.rate_limiter and generator.rate_limiter.summary():
+        print(f"      限流: {generator.rate_limiter.summary()}")
+
+    print("\n[推送] 推送到微信...")
+    news = results["news"]
+    analyzed_papers = results["paper_analysis"]
+    topic_info = results["topic"]
     notifier = ServerChanNotifier()
     success = notifier.send_daily_digest(
         date_str=date_str,
-        news_summary=news_summary,
+        news_summary=results["news_summary"],
         papers=analyzed_papers,
-        knowledge=knowledge,
-        topic=f"[{category}] {topic}",
-        images=images,
+        knowledge=results["knowledge"],
+        topic=f"[{topic_info['category']}] {topic_info['topic']}",
+        images=results["images"],
     )
 
-    print("\n[5/5] 完成!")
     if success:
+        pushed_papers = [item["paper_info"] for item in analyzed_papers]
+        SeenStore().mark_pushed(news=news, papers=pushed_papers)
+        NearDuplicateFilter().remember(news)
+        InterestProfile(kind="news").update(
+            [item["title"] + " " + item.get("summary", "") for item in news]
+        )
+        InterestProfile(kind="papers").update(
+            [paper["title"] + " " + paper["summary"] for paper in pushed_papers]
+        )
+    return success
+
+
+def main(resume: bool = False):
+    print("=" * 60)
+    print(f"  AI每日速递 - 开始运行 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+    config = load_config()
+    date_str = datetime.now().strftime("%Y-%m-%d")
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    metrics_enabled = config.get("metrics", {}).get("enabled", True)
+    if metrics_enabled:
+        metrics.start_run("daily_digest")
+
+    checkpoint = None
+    checkpoint_config = config.get("checkpoint", {})
+    if checkpoint_config.get("enabled", True):
+        checkpoint = RunCheckpoint(
+            os.path.join(get_data_dir(project_dir), "runs"), date_str
+        )
+        checkpoint.prune(checkpoint_config.get("retention_days", 7))
+        if resume:
+            print(f"      从检查点恢复: {checkpoint.run_dir}")
+
+    pipeline = build_pipeline(config, checkpoint, resume)
+    pipeline.add(
+        "push",
+        lambda **results: push_digest(date_str, results),
+        inputs=list(pipeline.stages),
+        checkpoint=True,
+    )
+    try:
+        results = pipeline.run()
+    finally:
+        metrics_file = (
+            metrics.finish_run(os.path.join(get_data_dir(project_dir), "metrics"))
+            if metrics_enabled
+            else None
+        )
+    success = results["push"]
+
+    print("\n[完成]")
+    print(f"      {pipeline.report()}")
+    if metrics_file:
+        print(f"      运行指标: {metrics_file}")
+    if pipeline.stages["push"].restored:
+        print("      今日已推送成功, 跳过推送")
+    elif success:
         print("      推送成功,请查收微信消息")
     else:
         print("      推送失败,请检查config.yaml中的sendkey配置")
+        if checkpoint:
+            print("      可使用 python main.py --resume 只重跑失败的阶段")
 
     print("=" * 60)
     return success
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="AI每日速递")
+    parser.add_argument(
+        "--resume", action="store_true", help="复用当天已完成阶段的检查点"
+    )
+    args = parser.parse_args()
+    main(resume=args.resume)
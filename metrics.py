@@ -0,0 +1,149 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _rounded(counters: Dict[str, float]) -> Dict[str, float]:
+    return {name: round(value, 4) for name, value in counters.items()}
+
+
+class Span:
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attrs):
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.counters: Dict[str, float] = {}
+        self.children: List["Span"] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def totals(self) -> Dict[str, float]:
+        totals = dict(self.counters)
+        for child in self.children:
+            for name, value in child.totals().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        data = {
+            "name": self.name,
+            "start": round(self.started_at - origin, 4),
+            "duration": round(self.duration, 4),
+        }
+        if self.attrs:
+            data["attrs"] = self.attrs
+        if self.counters:
+            data["counters"] = _rounded(self.counters)
+        totals = self.totals()
+        if self.children and totals:
+            data["totals"] = _rounded(totals)
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+class RunMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now()
+        self.root = Span(name)
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, parent: Optional[Span], **attrs) -> Span:
+        parent = parent or self.root
+        span = Span(name, parent, **attrs)
+        with self._lock:
+            parent.children.append(span)
+        return span
+
+    def add(self, span: Optional[Span], name: str, value: float):
+        span = span or self.root
+        with self._lock:
+            span.counters[name] = span.counters.get(name, 0) + value
+
+    def finish(self) -> Dict[str, Any]:
+        self.root.finished_at = time.perf_counter()
+        with self._lock:
+            return {
+                "run": self.name,
+                "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "duration": round(self.root.duration, 4),
+                "totals": _rounded(self.root.totals()),
+                "stages": [
+                    {
+                        "name": span.name,
+                        "start": round(span.started_at - self.root.started_at, 4),
+                        "duration": round(span.duration, 4),
+                        "totals": _rounded(span.totals()),
+                    }
+                    for span in self.root.children
+                ],
+                "spans": self.root.to_dict(self.root.started_at),
+            }
+
+
+_run: Optional[RunMetrics] = None
+_current: contextvars.ContextVar = contextvars.ContextVar("metrics_span", default=None)
+
+
+def start_run(name: str) -> RunMetrics:
+    global _run
+    _run = RunMetrics(name)
+    _current.set(None)
+    return _run
+
+
+@contextmanager
+def span(name: str, **attrs):
+    run = _run
+    if run is None:
+        yield None
+        return
+
+    current = run.start_span(name, _current.get(), **attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        current.finished_at = time.perf_counter()
+        _current.reset(token)
+
+
+def count(name: str, value: float = 1):
+    if _run is not None:
+        _run.add(_current.get(), name, value)
+
+
+def propagate(fn: Callable) -> Callable:
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+def finish_run(metrics_dir: str) -> Optional[str]:
+    global _run
+    run = _run
+    if run is None:
+        return None
+    _run = None
+
+    report = run.finish()
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(
+        metrics_dir, f"{run.name}_{run.started_at.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+FORMATS = ["message", "text"]
+
+
+class ModelHealth:
+    def __init__(
+        self,
+        health_file: str,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 1800,
+        latency_alpha: float = 0.3,
+        max_samples: int = 50,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        self.health_file = health_file
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.latency_alpha = latency_alpha
+        self.max_samples = max_samples
+        self.clock = clock or time.time
+        self._lock = threading.Lock()
+        self.models = self._load()
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.health_file):
+            try:
+                with open(self.health_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.health_file), exist_ok=True)
+            tmp_file = self.health_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.models, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.health_file)
+
+    def _state(self, model_name: str) -> Dict:
+        return self.models.setdefault(
+            model_name,
+            {
+                "successes": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "latency_ewma": None,
+                "ttft_ewma": None,
+                "tokens_per_sec_ewma": None,
+                "good_format": None,
+                "opened_at": None,
+                "latency_samples": [],
+                "ttft_samples": [],
+            },
+        )
+
+    def is_available(self, model_name: str) -> bool:
+        with self._lock:
+            opened_at = self.models.get(model_name, {}).get("opened_at")
+        return opened_at is None or self.clock() - opened_at >= self.cooldown_seconds
+
+    def formats(self, model_name: str) -> List[str]:
+        with self._lock:
+            good_format = self.models.get(model_name, {}).get("good_format")
+        if good_format in FORMATS:
+            return [good_format] + [f for f in FORMATS if f != good_format]
+        return list(FORMATS)
+
+    def order(self, model_configs: List[Dict]) -> List[Dict]:
+        with self._lock:
+            latency = {
+                name: state.get("latency_ewma") for name, state in self.models.items()
+            }
+
+        def sort_key(item):
+            index, config = item
+            ewma = latency.get(config.get("name", "qwen-plus"))
+            return (
+                config.get("priority", 999),
+                ewma if ewma is not None else float("inf"),
+                index,
+            )
+
+        return [config for _, config in sorted(enumerate(model_configs), key=sort_key)]
+
+    def success_rate(self, model_name: str) -> float:
+        with self._lock:
+            state = self.models.get(model_name, {})
+        total = state.get("successes", 0) + state.get("failures", 0)
+        return state.get("successes", 0) / total if total else 1.0
+
+    def _update_ewma(self, state: Dict, field: str, value: Optional[float]):
+        if value is None:
+            return
+        ewma = state.get(field)
+        state[field] = (
+            value
+            if ewma is None
+            else self.latency_alpha * value + (1 - self.latency_alpha) * ewma
+        )
+
+    def record_success(
+        self,
+        model_name: str,
+        result_format: str,
+        latency: float,
+        ttft: Optional[float] = None,
+        tokens_per_sec: Optional[float] = None,
+    ):
+        with self._lock:
+            state = self._state(model_name)
+            state["successes"] += 1
+            state["consecutive_failures"] = 0
+            state["opened_at"] = None
+            state["good_format"] = result_format
+            self._update_ewma(state, "latency_ewma", latency)
+            self._update_ewma(state, "ttft_ewma", ttft)
+            self._update_ewma(state, "tokens_per_sec_ewma", tokens_per_sec)
+            self._add_sample(state, "latency", latency)
+            self._add_sample(state, "ttft", ttft)
+
+    def _add_sample(self, state: Dict, field: str, value: Optional[float]):
+        if value is None:
+            return
+        samples = state.setdefault(f"{field}_samples", [])
+        samples.append(round(value, 3))
+        del samples[: -self.max_samples]
+
+    def percentile(
+        self, model_name: str, field: str, percent: float, min_samples: int = 5
+    ) -> Optional[float]:
+        with self._lock:
+            samples = sorted(
+                self.models.get(model_name, {}).get(f"{field}_samples", [])
+            )
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percent / 100))
+        return samples[index]
+
+    def record_failure(self, model_name: str):
+        with self._lock:
+            state = self._state(model_name)
+            state["failures"] += 1
+            state["consecutive_failures"] += 1
+            if state["consecutive_failures"] >= self.failure_threshold:
+                state["opened_at"] = self.clock()
+
+    def summary(self) -> str:
+        parts = []
+        for name in sorted(self.models):
+            state = self.models[name]
+            ewma = state.get("latency_ewma")
+            ttft = state.get("ttft_ewma")
+            tps = state.get("tokens_per_sec_ewma")
+            status = "熔断" if not self.is_available(name) else "正常"
+            parts.append(
+                f"{name}: {status}, 成功率 {self.success_rate(name) * 100:.0f}%, "
+                f"延迟 {f'{ewma:.1f}s' if ewma is not None else '-'}, "
+                f"首token {f'{ttft:.1f}s' if ttft is not None else '-'}, "
+                f"{f'{tps:.0f}' if tps is not None else '-'} tok/s"
+            )
+        return "; ".join(parts)
@@ -1,8 +1,10 @@
-import requests
 import yaml
 import os
 from typing import Optional
 
+import metrics
+from http_client import get_http_client
+
 
 def _get_config_path(config_path: str = "config.yaml") -> str:
     if os.path.isabs(config_path):
@@ -13,9 +15,12 @@ def _get_config_path(config_path: str = "config.yaml") -> str:
 
 class ServerChanNotifier:
     def __init__(self, config_path: str = "config.yaml"):
-        with open(_get_config_path(config_path), "r", encoding="utf-8") as f:
+        config_file = _get_config_path(config_path)
+        with open(config_file, "r", encoding="utf-8") as f:
             config = yaml.safe_load(f)
 
+        self.http = get_http_client(config_file)
+
         self.sendkey = (
             os.environ.get("SERVERCHAN_SENDKEY")
             or config["notifier"]["serverchan"]["sendkey"]
@@ -28,9 +33,11 @@ class ServerChanNotifier:
             return False
 
         try:
-            response = requests.post(
-                self.api_url, data={"title": title, "desp": content}, timeout=10
-            )
+            with metrics.span("push.serverchan"):
+                metrics.count("push.bytes", len(content.encode("utf-8")))
+                response = self.http.post(
+                    self.api_url, data={"title": title, "desp": content}, timeout=10
+                )
 
             result = response.json()
 
@@ -0,0 +1,236 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+import metrics
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+
+class RunCheckpoint:
+    def __init__(self, runs_dir: str, date_str: str):
+        self.runs_dir = runs_dir
+        self.run_dir = os.path.join(runs_dir, date_str)
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.run_dir, f"{stage}.json")
+
+    def load(self, stage: str) -> Tuple[bool, Any]:
+        try:
+            with open(self._path(stage), "r", encoding="utf-8") as f:
+                return True, json.load(f)["result"]
+        except (OSError, ValueError, KeyError):
+            return False, None
+
+    def save(self, stage: str, result: Any):
+        os.makedirs(self.run_dir, exist_ok=True)
+        path = self._path(stage)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "stage": stage,
+                    "saved_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "result": result,
+                },
+                f,
+                ensure_ascii=False,
+                default=str,
+            )
+        os.replace(path + ".tmp", path)
+
+    def clear(self):
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    def prune(self, retention_days: int):
+        if not os.path.isdir(self.runs_dir):
+            return
+        cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+        for name in os.listdir(self.runs_dir):
+            if name < cutoff:
+                shutil.rmtree(os.path.join(self.runs_dir, name), ignore_errors=True)
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: Sequence[str],
+        checkpoint: Union[bool, Callable[[Any], bool]] = False,
+    ):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.checkpoint = checkpoint
+        self.restored = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def should_save(self, result: Any) -> bool:
+        if callable(self.checkpoint):
+            return self.checkpoint(result)
+        return bool(self.checkpoint and result)
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class Pipeline:
+    def __init__(
+        self,
+        max_workers: int = 8,
+        checkpoint: Optional[RunCheckpoint] = None,
+        resume: bool = False,
+    ):
+        self.max_workers = max_workers
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: Sequence[str] = (),
+        checkpoint: Union[bool, Callable[[Any], bool]] = False,
+    ) -> "Pipeline":
+        if name in self.stages:
+            raise ValueError(f"重复的阶段: {name}")
+        self.stages[name] = Stage(name, fn, inputs, checkpoint)
+        return self
+
+    def _validate(self):
+        for stage in self.stages.values():
+            for dependency in stage.inputs:
+                if dependency not in self.stages:
+                    raise ValueError(f"阶段 {stage.name} 依赖未定义的阶段 {dependency}")
+
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"阶段依赖存在环: {name}")
+            visiting.add(name)
+            for dependency in self.stages[name].inputs:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _execute(self, stage: Stage) -> Any:
+        stage.started_at = time.perf_counter()
+        try:
+            with metrics.span(stage.name):
+                result = stage.fn(**{name: self.results[name] for name in stage.inputs})
+        finally:
+            stage.finished_at = time.perf_counter()
+
+        if self.checkpoint and stage.checkpoint and stage.should_save(result):
+            self.checkpoint.save(stage.name, result)
+        return result
+
+    def _restore(self, pending: Dict[str, Stage]):
+        if self.checkpoint and not self.resume:
+            self.checkpoint.clear()
+        if not (self.checkpoint and self.resume):
+            return
+
+        for name, stage in list(pending.items()):
+            if not stage.checkpoint:
+                continue
+            found, result = self.checkpoint.load(name)
+            if found:
+                self.results[name] = result
+                stage.restored = True
+                del pending[name]
+
+        dependents = {name for stage in self.stages.values() for name in stage.inputs}
+        needed = set()
+        stack = [name for name in pending if name not in dependents]
+        while stack:
+            name = stack.pop()
+            if name in needed or name not in pending:
+                continue
+            needed.add(name)
+            stack.extend(pending[name].inputs)
+        for name in list(pending):
+            if name not in needed:
+                del pending[name]
+
+    def run(self) -> Dict[str, Any]:
+        self._validate()
+        self.results = {}
+        self.started_at = time.perf_counter()
+        pending = dict(self.stages)
+        running = {}
+        self._restore(pending)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dependency in self.results for dependency in stage.inputs):
+                        running[
+                            executor.submit(metrics.propagate(self._execute), stage)
+                        ] = name
+                        del pending[name]
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.results[running.pop(future)] = future.result()
+        finally:
+            executor.shutdown(wait=not running, cancel_futures=True)
+            self.finished_at = time.perf_counter()
+        return self.results
+
+    def critical_path(self) -> List[Stage]:
+        finished = [s for s in self.stages.values() if s.finished_at is not None]
+        if not finished:
+            return []
+
+        path = [max(finished, key=lambda s: s.finished_at)]
+        while path[-1].inputs and not path[-1].restored:
+            path.append(
+                max(
+                    (self.stages[name] for name in path[-1].inputs),
+                    key=lambda s: s.finished_at or 0.0,
+                )
+            )
+        return list(reversed(path))
+
+    def report(self) -> str:
+        path = self.critical_path()
+        if not path or self.started_at is None:
+            if any(stage.restored for stage in self.stages.values()):
+                return "所有需要的阶段均已从检查点恢复"
+            return "未运行"
+
+        total = (self.finished_at or time.perf_counter()) - self.started_at
+        stage_time = sum(stage.duration for stage in path)
+        steps = " → ".join(
+            (
+                f"{stage.name}(已恢复)"
+                if stage.restored
+                else f"{stage.name}({stage.duration:.1f}s)"
+            )
+            for stage in path
+        )
+        report = (
+            f"关键路径 {steps}, 阶段耗时 {stage_time:.1f}s / 总耗时 {total:.1f}s, "
+            f"串行合计 {sum(s.duration for s in self.stages.values()):.1f}s"
+        )
+        restored = [name for name, stage in self.stages.items() if stage.restored]
+        if restored:
+            report += f", 从检查点恢复: {', '.join(restored)}"
+        return report
@@ -0,0 +1,82 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+CJK_PATTERN = re.compile(r"[　-〿一-鿿＀-￯]")
+
+
+def estimate_tokens(text: str) -> int:
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: Optional[int]) -> str:
+    if max_tokens is None or estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    budget = max_tokens * 4
+    for i, char in enumerate(text):
+        budget -= 4 if CJK_PATTERN.match(char) else 1
+        if budget < 0:
+            return text[:i].rstrip() + "…"
+    return text
+
+
+class PromptBuilder:
+    def __init__(self, max_input_tokens: int = 6000, min_item_tokens: int = 30):
+        self.max_input_tokens = max_input_tokens
+        self.min_item_tokens = min_item_tokens
+
+    def fit_items(
+        self,
+        items: List[Dict],
+        render: Callable[[Dict, Optional[int]], str],
+        score_fn: Callable[[Dict], float],
+        overhead_tokens: int,
+        max_item_tokens: Optional[int] = None,
+    ) -> Tuple[List[Tuple[Dict, str]], Dict]:
+        limits: List[Optional[int]] = [max_item_tokens] * len(items)
+        base = [estimate_tokens(render(item, 0)) for item in items]
+        sizes = [
+            estimate_tokens(render(item, limit)) for item, limit in zip(items, limits)
+        ]
+        trimmable = [size - fixed for size, fixed in zip(sizes, base)]
+        available = self.max_input_tokens - overhead_tokens
+
+        lowest_first = sorted(range(len(items)), key=lambda i: score_fn(items[i]))
+        trimmed = 0
+        for i in lowest_first:
+            over = sum(sizes) - available
+            if over <= 0:
+                break
+            cut = min(over, trimmable[i] - min(self.min_item_tokens, trimmable[i]))
+            if cut > 0:
+                limits[i] = trimmable[i] - cut
+                sizes[i] -= cut
+                trimmed += 1
+
+        dropped = set()
+        for i in lowest_first:
+            if sum(sizes) <= available:
+                break
+            dropped.add(i)
+            sizes[i] = 0
+
+        kept = [
+            (item, render(item, limit))
+            for i, (item, limit) in enumerate(zip(items, limits))
+            if i not in dropped
+        ]
+        stats = {"total": len(items), "kept": len(kept), "trimmed": trimmed}
+        return kept, stats
+
+    def log(self, label: str, prompt: str, stats: Optional[Dict] = None) -> int:
+        tokens = estimate_tokens(prompt)
+        detail = ""
+        if stats:
+            detail = f", 保留 {stats['kept']}/{stats['total']} 条, 截断 {stats['trimmed']} 条"
+        print(
+            f"      [{label}] 输入约 {tokens} tokens / 预算 {self.max_input_tokens}{detail}"
+        )
+        return tokens
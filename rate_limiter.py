@@ -0,0 +1,118 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class ModelLimiter:
+    def __init__(
+        self,
+        rpm: float = 60,
+        burst: int = 5,
+        max_concurrency: int = 4,
+        backoff: float = 2.0,
+        max_backoff: float = 60.0,
+    ):
+        self.rate = rpm / 60.0
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.tokens = float(self.burst)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.consecutive_throttles = 0
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wait_time(self, now: float) -> float:
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= int(self.limit):
+            return 0.2
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate if self.rate > 0 else 0.2
+        return 0.0
+
+    def acquire(self, cancelled: Optional[threading.Event] = None) -> bool:
+        with self._cond:
+            while True:
+                if cancelled and cancelled.is_set():
+                    return False
+                now = time.monotonic()
+                self._refill(now)
+                wait_time = self._wait_time(now)
+                if wait_time <= 0:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return True
+                self._cond.wait(min(wait_time, 0.2))
+
+    def release(self, outcome: str):
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "success":
+                self.consecutive_throttles = 0
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            elif outcome == "throttled":
+                self.throttled += 1
+                self.consecutive_throttles += 1
+                self.limit = max(1.0, self.limit / 2)
+                delay = min(
+                    self.max_backoff,
+                    self.backoff * 2 ** (self.consecutive_throttles - 1),
+                )
+                self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self._cond.notify_all()
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        model_configs: List[Dict],
+        rpm: float = 60,
+        burst: int = 5,
+        max_concurrency: int = 4,
+        backoff: float = 2.0,
+    ):
+        self.limiters: Dict[str, ModelLimiter] = {}
+        for config in model_configs:
+            self.limiters[config.get("name", "qwen-plus")] = ModelLimiter(
+                rpm=config.get("rpm", rpm),
+                burst=config.get("burst", burst),
+                max_concurrency=config.get("max_concurrency", max_concurrency),
+                backoff=backoff,
+            )
+        self._defaults = (rpm, burst, max_concurrency, backoff)
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str) -> ModelLimiter:
+        with self._lock:
+            if model_name not in self.limiters:
+                rpm, burst, max_concurrency, backoff = self._defaults
+                self.limiters[model_name] = ModelLimiter(
+                    rpm, burst, max_concurrency, backoff
+                )
+            return self.limiters[model_name]
+
+    def acquire(
+        self, model_name: str, cancelled: Optional[threading.Event] = None
+    ) -> bool:
+        return self.get(model_name).acquire(cancelled)
+
+    def release(self, model_name: str, outcome: str):
+        self.get(model_name).release(outcome)
+
+    def summary(self) -> str:
+        return "; ".join(
+            f"{name}: 并发上限 {limiter.limit:.1f}/{limiter.max_concurrency}, "
+            f"限流 {limiter.throttled} 次"
+            for name, limiter in sorted(self.limiters.items())
+            if limiter.throttled or limiter.limit < limiter.max_concurrency
+        )
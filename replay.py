@@ -0,0 +1,677 @@
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+import yaml
+from dashscope import Generation
+from dashscope.api_entities.dashscope_response import (
+    DashScopeAPIResponse,
+    GenerationResponse,
+)
+from requests.adapters import HTTPAdapter
+
+from data_paths import DATA_DIR_ENV
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(PROJECT_DIR, "data")
+FIXTURES_DIR = os.path.join(DATA_DIR, "fixtures")
+TRAFFIC_FILE = "traffic.json.gz"
+SNAPSHOT_DIR = "data"
+METRICS_DIR = "metrics"
+REDACTED = "REDACTED"
+PLACEHOLDER_ENV = ("SERVERCHAN_SENDKEY", "DASHSCOPE_API_KEY")
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _secrets(config_path: str = "config.yaml") -> List[str]:
+    config = {}
+    config_file = os.path.join(PROJECT_DIR, config_path)
+    if os.path.exists(config_file):
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+
+    values = [
+        os.environ.get("SERVERCHAN_SENDKEY"),
+        os.environ.get("DASHSCOPE_API_KEY"),
+        config.get("notifier", {}).get("serverchan", {}).get("sendkey"),
+        config.get("llm", {}).get("api_key"),
+    ]
+    return [v for v in values if v and v not in (REDACTED, "YOUR_SENDKEY")]
+
+
+def _redact(text: str, secrets: List[str]) -> str:
+    for secret in secrets:
+        text = text.replace(secret, REDACTED)
+    return text
+
+
+def _digest(*parts) -> str:
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part.encode("utf-8") if isinstance(part, str) else part)
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def _body_bytes(body) -> bytes:
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    return body if isinstance(body, bytes) else b""
+
+
+def http_keys(method: str, url: str, body) -> tuple:
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    canonical = urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+    fallback = f"{method} {parts.scheme}://{parts.netloc}{parts.path}"
+    return _digest(method, canonical, _body_bytes(body)), fallback
+
+
+def llm_keys(kwargs: Dict) -> tuple:
+    request = {
+        k: v for k, v in kwargs.items() if k not in ("request_timeout", "api_key")
+    }
+    key = _digest(json.dumps(request, sort_keys=True, ensure_ascii=False, default=str))
+    fallback = (
+        f"{kwargs.get('model')} {kwargs.get('result_format')} "
+        f"{bool(kwargs.get('stream'))}"
+    )
+    return key, fallback
+
+
+class ReplayArchive:
+    def __init__(self, path: str):
+        self.path = path
+        self.recorded_at: Optional[float] = None
+        self.http: Dict[str, List[Dict]] = {}
+        self.llm: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def traffic_file(self) -> str:
+        return os.path.join(self.path, TRAFFIC_FILE)
+
+    @property
+    def snapshot_dir(self) -> str:
+        return os.path.join(self.path, SNAPSHOT_DIR)
+
+    def load(self) -> "ReplayArchive":
+        with gzip.open(self.traffic_file, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        self.recorded_at = payload.get("recorded_at")
+        self.http = payload.get("http", {})
+        self.llm = payload.get("llm", {})
+        return self
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        payload = {
+            "version": 1,
+            "recorded_at": self.recorded_at,
+            "http": self.http,
+            "llm": self.llm,
+        }
+        tmp_file = self.traffic_file + ".tmp"
+        with gzip.open(tmp_file, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_file, self.traffic_file)
+
+    def add(self, kind: str, key: str, entry: Dict):
+        with self._lock:
+            getattr(self, kind).setdefault(key, []).append(entry)
+
+    def fallbacks(self, kind: str) -> Dict[str, List[Dict]]:
+        index: Dict[str, List[Dict]] = {}
+        for entries in getattr(self, kind).values():
+            for entry in entries:
+                index.setdefault(entry["fallback"], []).append(entry)
+        return index
+
+    def summary(self) -> str:
+        http_count = sum(len(v) for v in self.http.values())
+        llm_count = sum(len(v) for v in self.llm.values())
+        return f"HTTP {http_count} 次, LLM {llm_count} 次"
+
+
+def _response_dict(response) -> Dict:
+    fields = ("status_code", "request_id", "code", "message", "output", "usage")
+    return json.loads(
+        json.dumps(
+            {field: response.get(field) for field in fields},
+            ensure_ascii=False,
+            default=str,
+        )
+    )
+
+
+def _generation_response(data: Dict) -> GenerationResponse:
+    return GenerationResponse.from_api_response(
+        DashScopeAPIResponse(
+            status_code=data.get("status_code", 500),
+            request_id=data.get("request_id") or "",
+            code=data.get("code") or "",
+            message=data.get("message") or "",
+            output=data.get("output") or {},
+            usage=data.get("usage") or {},
+        )
+    )
+
+
+def _raise_recorded(error: Dict):
+    if error.get("type") in ("Timeout", "ReadTimeout", "ConnectTimeout"):
+        raise requests.exceptions.Timeout(error.get("message", ""))
+    raise requests.exceptions.ConnectionError(error.get("message", ""))
+
+
+class _Patch:
+    def __init__(self):
+        self._send = HTTPAdapter.send
+        self._call = Generation.__dict__["call"]
+        self._original_call = Generation.call
+
+    def install(self, send, call):
+        def patched_send(adapter, request, **kwargs):
+            return send(adapter, request, **kwargs)
+
+        HTTPAdapter.send = patched_send
+        Generation.call = staticmethod(call)
+
+    def restore(self):
+        HTTPAdapter.send = self._send
+        Generation.call = self._call
+
+
+class Recorder:
+    def __init__(self, archive: ReplayArchive):
+        self.archive = archive
+        self.secrets = _secrets()
+        self._local = threading.local()
+        self._patch: Optional[_Patch] = None
+
+    def __enter__(self) -> "Recorder":
+        self.archive.recorded_at = time.time()
+        self._patch = _Patch()
+        self._patch.install(self._send, self._call)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._patch.restore()
+        self.archive.save()
+
+    def _send(self, adapter, request, **kwargs):
+        if getattr(self._local, "in_llm", False):
+            return self._patch._send(adapter, request, **kwargs)
+
+        start = time.perf_counter()
+        response = self._patch._send(adapter, request, **kwargs)
+        content = response.content
+        url = _redact(request.url, self.secrets)
+        key, fallback = http_keys(request.method, url, request.body)
+        self.archive.add(
+            "http",
+            key,
+            {
+                "fallback": fallback,
+                "method": request.method,
+                "url": url,
+                "status": response.status_code,
+                "headers": {
+                    k: v
+                    for k, v in response.headers.items()
+                    if k.lower() not in DROPPED_HEADERS
+                },
+                "body": base64.b64encode(content or b"").decode("ascii"),
+                "elapsed": round(time.perf_counter() - start, 4),
+            },
+        )
+        return response
+
+    def _call(self, *args, **kwargs):
+        key, fallback = llm_keys(kwargs)
+        entry = {
+            "fallback": fallback,
+            "model": kwargs.get("model"),
+            "chunks": [],
+            "error": None,
+        }
+        start = time.perf_counter()
+
+        def add_chunk(response):
+            entry["chunks"].append(
+                {
+                    "offset": round(time.perf_counter() - start, 4),
+                    "response": _response_dict(response),
+                }
+            )
+
+        def fail(e: Exception):
+            entry["error"] = {"type": type(e).__name__, "message": str(e)[:200]}
+            self.archive.add("llm", key, entry)
+
+        self._local.in_llm = True
+        try:
+            result = self._patch._original_call(*args, **kwargs)
+        except Exception as e:
+            fail(e)
+            raise
+        finally:
+            self._local.in_llm = False
+
+        if not kwargs.get("stream"):
+            add_chunk(result)
+            self.archive.add("llm", key, entry)
+            return result
+
+        def stream():
+            self._local.in_llm = True
+            try:
+                for response in result:
+                    add_chunk(response)
+                    yield response
+            except Exception as e:
+                fail(e)
+                raise
+            finally:
+                self._local.in_llm = False
+            self.archive.add("llm", key, entry)
+
+        return stream()
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.standin.handle(self)
+
+    do_POST = do_GET
+    do_HEAD = do_GET
+    do_PUT = do_GET
+    do_DELETE = do_GET
+
+
+class StandInServer:
+    def __init__(
+        self,
+        archive: ReplayArchive,
+        latency: float = 0.0,
+        time_scale: float = 1.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.archive = archive
+        self.latency = latency
+        self.time_scale = time_scale
+        self.error_rate = error_rate
+        self.seed = seed
+        self.stats = {"served": 0, "misses": 0, "errors": 0}
+        self._fallbacks = {
+            "http": archive.fallbacks("http"),
+            "llm": archive.fallbacks("llm"),
+        }
+        self._counters: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.base_url = ""
+
+    def start(self) -> "StandInServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _next(self, kind: str, key: str, fallback: str) -> tuple:
+        with self._lock:
+            entries = getattr(self.archive, kind).get(key)
+            counter = (kind, key)
+            if not entries:
+                entries = self._fallbacks[kind].get(fallback)
+                counter = (kind, fallback)
+            if not entries:
+                self.stats["misses"] += 1
+                return None, False
+
+            n = self._counters.get(counter, 0)
+            self._counters[counter] = n + 1
+            failed = (
+                random.Random(f"{self.seed}:{counter}:{n}").random() < self.error_rate
+            )
+            self.stats["errors" if failed else "served"] += 1
+            return entries[min(n, len(entries) - 1)], failed
+
+    def handle(self, handler: BaseHTTPRequestHandler):
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        if handler.path == "/llm":
+            self._handle_llm(handler, json.loads(body or b"{}"))
+        else:
+            self._handle_http(handler)
+
+    def _reply(self, handler, status: int, headers: Dict, body: bytes):
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if handler.command != "HEAD":
+            handler.wfile.write(body)
+
+    def _handle_http(self, handler: BaseHTTPRequestHandler):
+        entry, failed = self._next(
+            "http",
+            handler.headers.get("X-Replay-Key", ""),
+            handler.headers.get("X-Replay-Fallback", ""),
+        )
+        if entry is None:
+            self._reply(handler, 404, {"X-Replay-Miss": "1"}, b"replay miss")
+            return
+
+        time.sleep(self.latency + entry.get("elapsed", 0) * self.time_scale)
+        if failed:
+            self._reply(handler, 503, {}, b"injected by replay server")
+            return
+        self._reply(
+            handler,
+            entry["status"],
+            entry.get("headers", {}),
+            base64.b64decode(entry.get("body", "")),
+        )
+
+    def _handle_llm(self, handler: BaseHTTPRequestHandler, request: Dict):
+        entry, failed = self._next("llm", request.get("key"), request.get("fallback"))
+        if entry is None:
+            lines = [{"response": {"status_code": 404, "code": "ReplayMiss"}}]
+        elif failed:
+            lines = [
+                {
+                    "response": {
+                        "status_code": 500,
+                        "code": "InternalError",
+                        "message": "injected by replay server",
+                    }
+                }
+            ]
+        else:
+            lines = list(entry["chunks"])
+            if entry.get("error"):
+                lines.append({"error": entry["error"]})
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.end_headers()
+        time.sleep(self.latency)
+        previous = 0.0
+        for line in lines:
+            offset = line.get("offset", previous)
+            time.sleep(max(0.0, offset - previous) * self.time_scale)
+            previous = offset
+            try:
+                handler.wfile.write(json.dumps(line).encode("utf-8") + b"\n")
+                handler.wfile.flush()
+            except OSError:
+                return
+
+
+class Replayer:
+    def __init__(self, server: StandInServer):
+        self.server = server
+        self.secrets = _secrets()
+        self.session = requests.Session()
+        self.session.trust_env = False
+        self._patch: Optional[_Patch] = None
+
+    def __enter__(self) -> "Replayer":
+        self._patch = _Patch()
+        self._patch.install(self._send, self._call)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._patch.restore()
+        self.session.close()
+
+    def _send(self, adapter, request, **kwargs):
+        if request.url.startswith(self.server.base_url):
+            return self._patch._send(adapter, request, **kwargs)
+
+        url = _redact(request.url, self.secrets)
+        key, fallback = http_keys(request.method, url, request.body)
+        replayed = request.copy()
+        replayed.url = f"{self.server.base_url}/http"
+        replayed.headers["X-Replay-Key"] = key
+        replayed.headers["X-Replay-Fallback"] = fallback
+        kwargs["proxies"] = {}
+        response = self._patch._send(adapter, replayed, **kwargs)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def _lines(self, kwargs: Dict) -> Iterator[Dict]:
+        key, fallback = llm_keys(kwargs)
+        response = self.session.post(
+            f"{self.server.base_url}/llm",
+            json={"key": key, "fallback": fallback},
+            stream=True,
+            timeout=kwargs.get("request_timeout"),
+        )
+        with response:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def _call(self, *args, **kwargs):
+        def stream():
+            for line in self._lines(kwargs):
+                if "error" in line:
+                    _raise_recorded(line["error"])
+                yield _generation_response(line["response"])
+
+        if kwargs.get("stream"):
+            return stream()
+
+        result = None
+        for result in stream():
+            pass
+        return result
+
+
+@contextmanager
+def frozen_clock(recorded_at: Optional[float]):
+    if recorded_at is None:
+        yield
+        return
+
+    offset = recorded_at - time.time()
+
+    class ReplayDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(time.time() + offset, tz)
+
+    class ReplayTime:
+        def __getattr__(self, name):
+            return getattr(time, name)
+
+        def time(self) -> float:
+            return time.time() + offset
+
+    replacements = {
+        "datetime": (datetime, ReplayDatetime),
+        "time": (time, ReplayTime()),
+    }
+    patched = []
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, "__file__", None) or ""
+        if not module_file.startswith(PROJECT_DIR) or module is sys.modules[__name__]:
+            continue
+        for name, (original, replacement) in replacements.items():
+            if getattr(module, name, None) is original:
+                setattr(module, name, replacement)
+                patched.append((module, name, original))
+    try:
+        yield
+    finally:
+        for module, name, original in patched:
+            setattr(module, name, original)
+
+
+def _data_entries() -> List[str]:
+    if not os.path.isdir(DATA_DIR):
+        return []
+    return [
+        name
+        for name in os.listdir(DATA_DIR)
+        if os.path.join(DATA_DIR, name) != FIXTURES_DIR and name != METRICS_DIR
+    ]
+
+
+def _copy_entries(source: str, names: List[str], target: str):
+    os.makedirs(target, exist_ok=True)
+    for name in names:
+        path = os.path.join(source, name)
+        if os.path.isdir(path):
+            shutil.copytree(path, os.path.join(target, name))
+        else:
+            shutil.copy2(path, os.path.join(target, name))
+
+
+def snapshot_data(target: str):
+    if os.path.exists(target):
+        shutil.rmtree(target)
+    _copy_entries(DATA_DIR, _data_entries(), target)
+
+
+@contextmanager
+def isolated_data(snapshot: Optional[str] = None, metrics_dir: Optional[str] = None):
+    data_root = tempfile.mkdtemp(prefix="replay_data_")
+    previous = os.environ.get(DATA_DIR_ENV)
+    try:
+        if snapshot and os.path.isdir(snapshot):
+            names = [name for name in os.listdir(snapshot) if name != METRICS_DIR]
+            _copy_entries(snapshot, names, data_root)
+        else:
+            _copy_entries(DATA_DIR, _data_entries(), data_root)
+        os.environ[DATA_DIR_ENV] = data_root
+        yield data_root
+    finally:
+        if previous is None:
+            os.environ.pop(DATA_DIR_ENV, None)
+        else:
+            os.environ[DATA_DIR_ENV] = previous
+        run_metrics = os.path.join(data_root, METRICS_DIR)
+        if metrics_dir and os.path.isdir(run_metrics):
+            shutil.copytree(run_metrics, metrics_dir, dirs_exist_ok=True)
+        shutil.rmtree(data_root, ignore_errors=True)
+
+
+@contextmanager
+def replaying(
+    archive: ReplayArchive,
+    latency: float = 0.0,
+    time_scale: float = 1.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+    metrics_dir: Optional[str] = None,
+):
+    server = StandInServer(archive, latency, time_scale, error_rate, seed)
+    saved_env = {name: os.environ.get(name) for name in PLACEHOLDER_ENV}
+    os.environ.update({name: REDACTED for name in PLACEHOLDER_ENV})
+    random.seed(seed)
+    try:
+        with isolated_data(archive.snapshot_dir, metrics_dir), server, Replayer(server):
+            with frozen_clock(archive.recorded_at):
+                yield server
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def archive_path(name: str) -> str:
+    if os.path.isabs(name) or os.sep in name:
+        return name
+    return os.path.join(FIXTURES_DIR, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制/回放一次完整运行的外部请求")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="真实运行main并录制")
+    record_parser.add_argument("name", help="存档名(保存在data/fixtures/下)或路径")
+
+    replay_parser = subparsers.add_parser("replay", help="离线回放存档运行main")
+    replay_parser.add_argument("name")
+    replay_parser.add_argument(
+        "--latency", type=float, default=0.0, help="额外延迟(秒)"
+    )
+    replay_parser.add_argument(
+        "--time-scale", type=float, default=1.0, help="录制耗时的缩放倍数, 0为不等待"
+    )
+    replay_parser.add_argument("--error-rate", type=float, default=0.0)
+    replay_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import main as digest
+
+    archive = ReplayArchive(archive_path(args.name))
+    if args.command == "record":
+        snapshot_data(archive.snapshot_dir)
+        with Recorder(archive):
+            digest.main()
+        print(f"\n录制完成: {archive.summary()} -> {archive.path}")
+        return
+
+    archive.load()
+    metrics_dir = os.path.join(archive.path, METRICS_DIR)
+    with replaying(
+        archive,
+        args.latency,
+        args.time_scale,
+        args.error_rate,
+        args.seed,
+        metrics_dir=metrics_dir,
+    ) as server:
+        start = time.perf_counter()
+        digest.main()
+        elapsed = time.perf_counter() - start
+    print(
+        f"\n回放完成: 耗时 {elapsed:.1f}s, 命中 {server.stats['served']}, "
+        f"缺失 {server.stats['misses']}, 注入错误 {server.stats['errors']}"
+    )
+    print(f"运行指标已保存到 {metrics_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime, timedelta
+from sources.arxiv_fetcher import ArxivFetcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询本地论文BM25索引")
+    parser.add_argument(
+        "query", nargs="?", help="查询文本, 留空则使用配置中的关键词画像"
+    )
+    parser.add_argument("--days", type=int, default=None, help="只检索最近N天的论文")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--config", default="config.yaml")
+    args = parser.parse_args()
+
+    fetcher = ArxivFetcher(args.config)
+    index = fetcher.index
+
+    start = time.perf_counter()
+    indexed = index.sync()
+    if indexed:
+        print(f"索引更新: {indexed} 篇 ({time.perf_counter() - start:.2f}s)")
+
+    profile = [(args.query, 1.0)] if args.query else fetcher.query_profile
+    since = datetime.now() - timedelta(days=args.days) if args.days else None
+
+    start = time.perf_counter()
+    ranked = index.rank(profile, since=since, limit=args.top)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    papers = fetcher.store.get_papers([arxiv_id for arxiv_id, _, _ in ranked])
+    print(f"共 {fetcher.store.count()} 篇, 查询耗时 {elapsed:.1f} ms")
+    for i, (arxiv_id, score, _) in enumerate(ranked, 1):
+        paper = papers.get(arxiv_id, {})
+        print(f"{i:>3}. {score:7.2f}  {arxiv_id}  {paper.get('title', '')[:80]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import gzip
+import json
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from lxml import etree
+
+from sources.paper_store import TIMESTAMP_FORMAT, PaperStore
+
+OAI_RECORD_TAG = "{http://www.openarchives.org/OAI/2.0/}record"
+
+MONTHS = {
+    month: f"{i:02d}"
+    for i, month in enumerate(
+        "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split(), 1
+    )
+}
+
+
+def _local_name(tag) -> str:
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _clean(text: Optional[str]) -> str:
+    return " ".join((text or "").split())
+
+
+def _parse_date(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    if not value:
+        return None
+
+    parts = value.split()
+    if len(parts) == 6 and parts[5] == "GMT" and parts[2] in MONTHS:
+        return f"{parts[3]}-{MONTHS[parts[2]]}-{int(parts[1]):02d} {parts[4]}"
+
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime(TIMESTAMP_FORMAT)
+
+
+class CategoryFilter:
+    def __init__(self, categories: Iterable[str]):
+        self.categories = set(categories)
+        self.needles = [category.encode("utf-8") for category in self.categories]
+
+    def maybe_matches(self, raw: bytes) -> bool:
+        return not self.categories or any(needle in raw for needle in self.needles)
+
+    def matches(self, categories: List[str]) -> bool:
+        if not self.categories:
+            return True
+        return any(
+            category in self.categories or category.split(".")[0] in self.categories
+            for category in categories
+        )
+
+
+def _make_paper(
+    arxiv_id: str,
+    version: str,
+    title: str,
+    summary: str,
+    authors: List[str],
+    categories: List[str],
+    published: Optional[str],
+    updated: Optional[str],
+) -> Optional[Dict]:
+    if not arxiv_id or not title or not published:
+        return None
+    return {
+        "title": _clean(title),
+        "arxiv_id": arxiv_id + version,
+        "url": f"http://arxiv.org/abs/{arxiv_id}{version}",
+        "pdf_url": f"http://arxiv.org/pdf/{arxiv_id}{version}",
+        "authors": authors[:3],
+        "summary": _clean(summary),
+        "published": published,
+        "updated": updated or published,
+        "categories": categories,
+    }
+
+
+def _json_record_to_paper(record: Dict) -> Optional[Dict]:
+    versions = record.get("versions") or []
+    if versions:
+        published = _parse_date(versions[0].get("created"))
+        updated = _parse_date(versions[-1].get("created"))
+        version = versions[-1].get("version", "")
+    else:
+        published = updated = _parse_date(record.get("update_date"))
+        version = ""
+
+    if record.get("authors_parsed"):
+        authors = [
+            " ".join(part for part in (name[1], name[0]) if part).strip()
+            for name in record["authors_parsed"]
+        ]
+    else:
+        authors = [name.strip() for name in (record.get("authors") or "").split(",")]
+
+    return _make_paper(
+        record.get("id", ""),
+        version,
+        record.get("title", ""),
+        record.get("abstract", ""),
+        [author for author in authors if author],
+        (record.get("categories") or "").split(),
+        published,
+        updated,
+    )
+
+
+def iter_json_records(
+    stream, category_filter: CategoryFilter, stats: Dict
+) -> Iterator[Dict]:
+    for line in stream:
+        stats["scanned"] += 1
+        if not category_filter.maybe_matches(line):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            stats["errors"] += 1
+            continue
+        if not category_filter.matches((record.get("categories") or "").split()):
+            continue
+        paper = _json_record_to_paper(record)
+        if paper is None:
+            stats["errors"] += 1
+            continue
+        yield paper
+
+
+def _oai_record_to_paper(metadata) -> Optional[Dict]:
+    fields: Dict[str, str] = {}
+    authors: List[str] = []
+    versions: List[tuple] = []
+
+    for child in metadata:
+        name = _local_name(child.tag)
+        if name == "authors":
+            parts = {_local_name(author.tag) for author in child.iter()}
+            if "keyname" in parts:
+                for author in child:
+                    names = {
+                        _local_name(part.tag): _clean(part.text) for part in author
+                    }
+                    full_name = " ".join(
+                        part
+                        for part in (names.get("forenames"), names.get("keyname"))
+                        if part
+                    )
+                    if full_name:
+                        authors.append(full_name)
+            else:
+                authors = [
+                    name.strip()
+                    for name in _clean(child.text).split(",")
+                    if name.strip()
+                ]
+        elif name == "version":
+            dates = [part.text for part in child if _local_name(part.tag) == "date"]
+            versions.append(
+                (
+                    child.get("version", ""),
+                    _parse_date(_clean(dates[0]) if dates else ""),
+                )
+            )
+        elif name not in fields:
+            fields[name] = "".join(child.itertext())
+
+    if versions:
+        published, updated, version = versions[0][1], versions[-1][1], versions[-1][0]
+    else:
+        published = _parse_date(fields.get("created"))
+        updated = _parse_date(fields.get("updated")) or published
+        version = ""
+
+    return _make_paper(
+        _clean(fields.get("id")),
+        version,
+        fields.get("title", ""),
+        fields.get("abstract", ""),
+        authors,
+        _clean(fields.get("categories")).split(),
+        published,
+        updated,
+    )
+
+
+def iter_oai_records(
+    stream, category_filter: CategoryFilter, stats: Dict
+) -> Iterator[Dict]:
+    for _, elem in etree.iterparse(
+        stream, events=("end",), tag=OAI_RECORD_TAG, recover=True
+    ):
+        stats["scanned"] += 1
+        children = {_local_name(child.tag): child for child in elem}
+        header = children.get("header")
+        metadata = children.get("metadata")
+
+        paper = None
+        if (
+            header is not None
+            and header.get("status") != "deleted"
+            and metadata is not None
+        ):
+            payload = next(iter(metadata), None)
+            if payload is not None:
+                paper = _oai_record_to_paper(payload)
+                if paper is None:
+                    stats["errors"] += 1
+
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+        if paper is not None and category_filter.matches(paper["categories"]):
+            yield paper
+
+
+def _open_dump(path: str):
+    raw = open(path, "rb")
+    magic = raw.read(2)
+    raw.seek(0)
+    stream = gzip.GzipFile(fileobj=raw) if magic == b"\x1f\x8b" else raw
+
+    head = stream.peek(64) if hasattr(stream, "peek") else b""
+    is_xml = head.lstrip()[:1] == b"<"
+    return raw, stream, is_xml
+
+
+def backfill(
+    paths: List[str],
+    store: PaperStore,
+    categories: Iterable[str],
+    batch_size: int = 2000,
+    progress_every: int = 100000,
+) -> Dict:
+    category_filter = CategoryFilter(categories)
+    stats = {"scanned": 0, "kept": 0, "changed": 0, "errors": 0, "bytes": 0}
+    start = time.perf_counter()
+
+    for path in paths:
+        raw, stream, is_xml = _open_dump(path)
+        print(f"  [回填] {path} ({'OAI-PMH XML' if is_xml else 'JSON Lines'})")
+        records = iter_oai_records if is_xml else iter_json_records
+        base_bytes = stats["bytes"]
+        next_report = stats["scanned"] + progress_every
+
+        batch = []
+        try:
+            for paper in records(stream, category_filter, stats):
+                batch.append(paper)
+                if len(batch) >= batch_size:
+                    stats["changed"] += store.upsert_papers(batch)
+                    stats["kept"] += len(batch)
+                    batch = []
+                if stats["scanned"] >= next_report:
+                    stats["bytes"] = base_bytes + raw.tell()
+                    _print_progress(stats, time.perf_counter() - start)
+                    next_report = stats["scanned"] + progress_every
+        finally:
+            stats["changed"] += store.upsert_papers(batch)
+            stats["kept"] += len(batch)
+            stats["bytes"] = base_bytes + raw.tell()
+            raw.close()
+
+    stats["seconds"] = time.perf_counter() - start
+    _print_progress(stats, stats["seconds"])
+    return stats
+
+
+def _print_progress(stats: Dict, elapsed: float):
+    elapsed = max(elapsed, 1e-9)
+    print(
+        f"  [回填] 扫描 {stats['scanned']} 条, 入库 {stats['kept']} 条 "
+        f"(新增/更新 {stats['changed']}), 解析失败 {stats['errors']} 条 | "
+        f"{stats['scanned'] / elapsed:.0f} 条/s, "
+        f"{stats['bytes'] / elapsed / 1024 / 1024:.1f} MB/s"
+    )
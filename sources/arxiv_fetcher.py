@@ -1,10 +1,46 @@
 import arxiv
 import os
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import quote_plus
 import yaml
 import re
 
+import metrics
+from data_paths import get_data_dir
+from http_client import get_http_client
+from sources.interest_profile import InterestProfile
+from sources.paper_index import PaperIndex, tokenize
+from sources.paper_store import TIMESTAMP_FORMAT, PaperStore, split_arxiv_id
+from sources.seen_store import SeenStore
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+
+PRIORITY_KEYWORDS = [
+    ("fine-tuning", 15),
+    ("finetuning", 15),
+    ("lora", 15),
+    ("peft", 15),
+    ("llm", 12),
+    ("large language model", 12),
+    ("gpt", 10),
+    ("bert", 8),
+    ("continual learning", 12),
+    ("instruction tuning", 12),
+    ("rlhf", 12),
+    ("dpo", 12),
+    ("moe", 10),
+    ("mixture of experts", 10),
+    ("multimodal", 10),
+    ("vision language", 10),
+    ("reasoning", 8),
+    ("chain of thought", 10),
+    ("quantization", 8),
+    ("distillation", 8),
+    ("transformer", 6),
+    ("attention", 6),
+]
+
 
 def _get_config_path(config_path: str = "config.yaml") -> str:
     if os.path.isabs(config_path):
@@ -13,9 +49,30 @@ def _get_config_path(config_path: str = "config.yaml") -> str:
     return os.path.join(project_root, config_path)
 
 
+def _to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _paper_mark(paper: Dict) -> Tuple[datetime, str]:
+    return datetime.strptime(paper["published"], TIMESTAMP_FORMAT), paper["arxiv_id"]
+
+
+def _describe_gap(
+    gap: Tuple[Tuple[datetime, str], Optional[Tuple[datetime, str]]], cutoff: datetime
+) -> str:
+    cursor, floor = gap
+    lower = max(floor[0], cutoff) if floor else cutoff
+    return (
+        f"{lower.strftime('%Y-%m-%d %H:%M')} ~ {cursor[0].strftime('%Y-%m-%d %H:%M')}"
+    )
+
+
 class ArxivFetcher:
     def __init__(self, config_path: str = "config.yaml"):
-        with open(_get_config_path(config_path), "r", encoding="utf-8") as f:
+        config_file = _get_config_path(config_path)
+        with open(config_file, "r", encoding="utf-8") as f:
             config = yaml.safe_load(f)
         self.config = config["arxiv"]
         self.categories = self.config["categories"]
@@ -23,102 +80,252 @@ class ArxivFetcher:
         self.max_papers = self.config["max_papers"]
         self.days_back = self.config["days_back"]
 
+        self.seen_store = SeenStore(config_file)
+
+        self.query_pushdown = self.config.get("query_pushdown", True)
+        self.max_query_length = self.config.get("max_query_length", 1000)
+        self.report_savings = self.config.get("report_savings", False)
+        self.http = get_http_client(config_file)
+
+        harvest_config = self.config.get("harvest", {})
+        self.page_size = harvest_config.get("page_size", 100)
+        self.harvest_limit = harvest_config.get("max_results", 1000)
+        db_file = os.path.join(get_data_dir(os.path.dirname(config_file)), "papers.db")
+        self.store = PaperStore(db_file)
+
+        ranking_config = self.config.get("ranking", {})
+        self.index = PaperIndex(
+            db_file,
+            k1=ranking_config.get("k1", 1.2),
+            b=ranking_config.get("b", 0.75),
+            title_boost=ranking_config.get("title_boost", 2),
+        )
+        self.query_profile = [(kw, 1.0) for kw in self.keywords] + [
+            (kw, bonus / 10) for kw, bonus in PRIORITY_KEYWORDS
+        ]
+        self.keyword_terms = [(kw, set(tokenize(kw))) for kw in self.keywords]
+        self.interest = InterestProfile(config_file, kind="papers")
+
     def _build_query(self) -> str:
         cat_query = " OR ".join([f"cat:{cat}" for cat in self.categories])
         return f"({cat_query})"
 
-    def _matches_keywords(self, title: str, abstract: str) -> tuple[bool, List[str]]:
-        text = (title + " " + abstract).lower()
-        matched_keywords = []
-        for keyword in self.keywords:
-            if keyword.lower() in text:
-                matched_keywords.append(keyword)
-        return len(matched_keywords) > 0, matched_keywords
-
-    def _calculate_relevance_score(
-        self, paper: arxiv.Result, matched_keywords: List[str]
-    ) -> int:
-        score = len(matched_keywords) * 10
-        title_lower = paper.title.lower()
-
-        priority_keywords = [
-            ("fine-tuning", 15),
-            ("finetuning", 15),
-            ("lora", 15),
-            ("peft", 15),
-            ("llm", 12),
-            ("large language model", 12),
-            ("gpt", 10),
-            ("bert", 8),
-            ("continual learning", 12),
-            ("instruction tuning", 12),
-            ("rlhf", 12),
-            ("dpo", 12),
-            ("moe", 10),
-            ("mixture of experts", 10),
-            ("multimodal", 10),
-            ("vision language", 10),
-            ("reasoning", 8),
-            ("chain of thought", 10),
-            ("quantization", 8),
-            ("distillation", 8),
-            ("transformer", 6),
-            ("attention", 6),
-        ]
+    def _build_queries(self) -> List[str]:
+        cat_query = self._build_query()
+        if not self.query_pushdown:
+            return [cat_query]
 
-        for kw, bonus in priority_keywords:
-            if kw in title_lower:
-                score += bonus
+        clauses = []
+        for keyword in dict.fromkeys(self.keywords):
+            term = keyword.replace('"', "")
+            clauses.append(f'ti:"{term}" OR abs:"{term}"')
 
-        return score
+        queries = []
+        chunk: List[str] = []
+        for clause in clauses:
+            candidate = chunk + [clause]
+            query = f"{cat_query} AND ({' OR '.join(candidate)})"
+            if chunk and len(quote_plus(query)) > self.max_query_length:
+                queries.append(f"{cat_query} AND ({' OR '.join(chunk)})")
+                chunk = [clause]
+            else:
+                chunk = candidate
+        if chunk:
+            queries.append(f"{cat_query} AND ({' OR '.join(chunk)})")
+        return queries
 
-    def fetch_papers(self) -> List[Dict]:
-        papers_with_scores = []
+    def _count_results(self, query: str, since: datetime) -> Optional[int]:
+        window = (
+            f"submittedDate:[{since.strftime('%Y%m%d%H%M')} "
+            f"TO {datetime.now(timezone.utc).strftime('%Y%m%d%H%M')}]"
+        )
+        response = self.http.get(
+            ARXIV_API_URL,
+            params={"search_query": f"{query} AND {window}", "max_results": 0},
+            timeout=30,
+        )
+        m = re.search(r"<opensearch:totalResults[^>]*>(\d+)<", response.text)
+        return int(m.group(1)) if m else None
 
-        query = self._build_query()
+    def _report_savings(self, fetched: int, since: datetime):
+        try:
+            baseline = self._count_results(self._build_query(), since)
+        except Exception as e:
+            print(f"  [arXiv] 统计节省量失败: {e}")
+            return
+        if baseline is None:
+            return
+        saved = max(baseline - fetched, 0)
+        ratio = saved / baseline * 100 if baseline else 0
+        print(
+            f"  [arXiv] 关键词下推: 抓取 {fetched} 条, 仅按分类需 {baseline} 条, "
+            f"节省 {saved} 条 ({ratio:.0f}%)"
+        )
+
+    def _result_to_paper(self, result: arxiv.Result) -> Dict:
+        return {
+            "title": result.title,
+            "arxiv_id": result.entry_id.split("/")[-1],
+            "url": result.entry_id,
+            "pdf_url": result.pdf_url,
+            "authors": [author.name for author in result.authors[:3]],
+            "summary": result.summary.replace("\n", " ").strip(),
+            "published": _to_naive_utc(result.published).strftime(TIMESTAMP_FORMAT),
+            "updated": _to_naive_utc(result.updated).strftime(TIMESTAMP_FORMAT),
+            "categories": result.categories,
+        }
+
+    def _harvest_pass(
+        self,
+        query: str,
+        client: arxiv.Client,
+        stop_before: datetime,
+        stop_id: Optional[str],
+        limit: int,
+        label: str,
+    ) -> Tuple[List[Dict], bool]:
+        search = arxiv.Search(
+            query=query,
+            max_results=limit,
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+            sort_order=arxiv.SortOrder.Descending,
+        )
 
+        batch = []
+        complete = False
         try:
-            search = arxiv.Search(
-                query=query,
-                max_results=self.max_papers * 3,
-                sort_by=arxiv.SortCriterion.SubmittedDate,
-                sort_order=arxiv.SortOrder.Descending,
+            for result in client.results(search):
+                arxiv_id = result.entry_id.split("/")[-1]
+                if (
+                    _to_naive_utc(result.published) < stop_before
+                    or split_arxiv_id(arxiv_id)[0] == stop_id
+                ):
+                    complete = True
+                    break
+                batch.append(self._result_to_paper(result))
+            else:
+                complete = len(batch) < limit
+        finally:
+            changed = self.store.upsert_papers(batch)
+            print(f"  [arXiv] {label} {len(batch)} 篇, 新增/更新 {changed} 篇")
+        return batch, complete
+
+    def _harvest(self, query: str, client: arxiv.Client) -> Tuple[int, datetime]:
+        watermark = self.store.get_watermark(query)
+        gap = self.store.get_gap(query)
+        cutoff_date = datetime.now() - timedelta(days=self.days_back)
+        stop_before = max(watermark[0], cutoff_date) if watermark else cutoff_date
+        watermark_id = split_arxiv_id(watermark[1])[0] if watermark else None
+
+        batch, complete = self._harvest_pass(
+            query, client, stop_before, watermark_id, self.harvest_limit, "增量抓取"
+        )
+        if batch:
+            newest = _paper_mark(batch[0])
+            if not watermark or newest[0] >= watermark[0]:
+                self.store.set_watermark(query, *newest)
+        if not complete:
+            floor = gap[1] if gap else watermark
+            gap = (_paper_mark(batch[-1]), floor)
+            self.store.set_gap(query, *gap)
+            print(
+                f"  [arXiv] 达到单次上限 {self.harvest_limit}, "
+                f"{_describe_gap(gap, cutoff_date)} 留待下次续抓"
             )
+            return len(batch), stop_before
+        if not gap:
+            return len(batch), stop_before
 
-            cutoff_date = datetime.now() - timedelta(days=self.days_back)
+        cursor, floor = gap
+        gap_stop = max(floor[0], cutoff_date) if floor else cutoff_date
+        if cursor[0] < gap_stop:
+            self.store.clear_gap(query)
+            return len(batch), stop_before
 
-            for result in search.results():
-                if result.published.replace(tzinfo=None) < cutoff_date:
-                    continue
+        window = (
+            f"submittedDate:[{gap_stop.strftime('%Y%m%d%H%M')} "
+            f"TO {cursor[0].strftime('%Y%m%d%H%M')}]"
+        )
+        filled, gap_complete = self._harvest_pass(
+            f"{query} AND {window}",
+            client,
+            gap_stop,
+            split_arxiv_id(floor[1])[0] if floor else None,
+            self.harvest_limit - len(batch),
+            "续抓缺口",
+        )
+        if gap_complete:
+            self.store.clear_gap(query)
+        elif filled:
+            gap = (_paper_mark(filled[-1]), floor)
+            self.store.set_gap(query, *gap)
+            print(
+                f"  [arXiv] 缺口未补齐, {_describe_gap(gap, cutoff_date)} 留待下次续抓"
+            )
+        return len(batch) + len(filled), min(stop_before, gap_stop)
 
-                matches, matched_keywords = self._matches_keywords(
-                    result.title, result.summary
-                )
+    def fetch_papers(self) -> List[Dict]:
+        client = arxiv.Client(page_size=self.page_size, delay_seconds=3, num_retries=3)
+        queries = self._build_queries()
+        fetched = 0
+        since = None
+        for query in queries:
+            try:
+                with metrics.span("arxiv.harvest", query=query):
+                    count, stop_before = self._harvest(query, client)
+                    metrics.count("arxiv.results", count)
+                fetched += count
+                since = stop_before if since is None else min(since, stop_before)
+            except Exception as e:
+                print(f"Error fetching from arXiv: {e}")
 
-                if matches:
-                    score = self._calculate_relevance_score(result, matched_keywords)
-
-                    paper_data = {
-                        "title": result.title,
-                        "arxiv_id": result.entry_id.split("/")[-1],
-                        "url": result.entry_id,
-                        "pdf_url": result.pdf_url,
-                        "authors": [author.name for author in result.authors[:3]],
-                        "summary": result.summary.replace("\n", " ").strip(),
-                        "published": result.published.strftime("%Y-%m-%d"),
-                        "categories": result.categories,
-                        "matched_keywords": matched_keywords,
-                        "relevance_score": score,
-                    }
-                    papers_with_scores.append((paper_data, score))
+        if self.query_pushdown and self.report_savings and since is not None:
+            self._report_savings(fetched, since)
 
-        except Exception as e:
-            print(f"Error fetching from arXiv: {e}")
-            return []
+        cutoff_date = datetime.now() - timedelta(days=self.days_back)
+        candidates = self.store.papers_since(cutoff_date)
+
+        unseen = self.seen_store.filter_papers(candidates)
+        if len(unseen) < len(candidates):
+            print(f"  已推送过: 跳过 {len(candidates) - len(unseen)} 篇")
+
+        with metrics.span("arxiv.rank"):
+            self.index.sync()
+            papers_by_id = {split_arxiv_id(p["arxiv_id"])[0]: p for p in unseen}
+            ranked = [
+                (papers_by_id[arxiv_id], score, set(terms))
+                for arxiv_id, score, terms in self.index.rank(
+                    self.query_profile, since=cutoff_date
+                )
+                if arxiv_id in papers_by_id
+            ]
+        if ranked:
+            bonus = self.interest.bonus(
+                [paper["title"] + " " + paper["summary"] for paper, _, _ in ranked]
+            )
+            ranked = [
+                (paper, score + float(extra), terms)
+                for (paper, score, terms), extra in zip(ranked, bonus)
+            ]
+            ranked.sort(key=lambda x: x[1], reverse=True)
+
+        selected = []
+        for paper_data, score, terms in ranked:
+            matched_keywords = [
+                kw
+                for kw, kw_terms in self.keyword_terms
+                if kw_terms and kw_terms <= terms
+            ]
+            if not matched_keywords:
+                continue
 
-        papers_with_scores.sort(key=lambda x: x[1], reverse=True)
+            paper_data["matched_keywords"] = matched_keywords
+            paper_data["relevance_score"] = round(score, 2)
+            selected.append(paper_data)
+            if len(selected) >= self.max_papers:
+                break
 
-        return [paper for paper, score in papers_with_scores[: self.max_papers]]
+        return selected
 
 
 def fetch_arxiv_papers(config_path: str = "config.yaml") -> List[Dict]:
@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class FeedCache:
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.feeds = self._load()
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        with self._lock:
+            cached = self.feeds.get(url)
+        if not cached:
+            return {}
+
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
+    def get_entries(self, url: str) -> Optional[List[Dict]]:
+        with self._lock:
+            cached = self.feeds.get(url)
+        if cached is None:
+            return None
+        return cached.get("entries", [])
+
+    def update(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        entries: List[Dict],
+    ):
+        with self._lock:
+            if not etag and not last_modified:
+                if self.feeds.pop(url, None) is not None:
+                    self._dirty = True
+                return
+            self.feeds[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "entries": entries,
+            }
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = self.cache_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.feeds, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
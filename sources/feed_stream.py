@@ -0,0 +1,129 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional
+
+from lxml import etree
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+ENTRY_TAGS = {"item", "entry"}
+DATE_TAGS = ("pubDate", "published", "updated", "date")
+SUMMARY_TAGS = ("description", "summary", "encoded", "content")
+
+
+class TeeReader:
+    def __init__(self, raw):
+        self.raw = raw
+        self.buffer: Optional[bytearray] = bytearray()
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        if data:
+            self.bytes_read += len(data)
+            if self.buffer is not None:
+                self.buffer.extend(data)
+        return data
+
+    def read_all(self) -> bytes:
+        while self.read(65536):
+            pass
+        return bytes(self.buffer or b"")
+
+    def release(self):
+        self.buffer = None
+
+
+def _local_name(tag) -> str:
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_entry(elem) -> Dict:
+    fields: Dict[str, str] = {}
+    link = ""
+
+    for child in elem:
+        name = _local_name(child.tag)
+        if name == "link":
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate":
+                link = link or href
+            elif not href:
+                link = link or (child.text or "").strip()
+            continue
+        if name not in fields:
+            fields[name] = "".join(child.itertext()).strip()
+
+    published = None
+    for name in DATE_TAGS:
+        if fields.get(name):
+            published = _parse_date(fields[name])
+            if published:
+                break
+
+    summary = ""
+    for name in SUMMARY_TAGS:
+        if fields.get(name):
+            summary = fields[name]
+            break
+
+    return {
+        "title": fields.get("title", ""),
+        "summary": summary,
+        "link": link,
+        "published": published.strftime(TIMESTAMP_FORMAT) if published else None,
+    }
+
+
+def iter_feed_entries(
+    stream,
+    max_entries: int = 30,
+    cutoff: Optional[datetime] = None,
+    stale_limit: int = 5,
+) -> Iterator[Dict]:
+    seen = 0
+    stale = 0
+
+    for _, elem in etree.iterparse(stream, events=("end",)):
+        if _local_name(elem.tag) not in ENTRY_TAGS:
+            continue
+
+        entry = _parse_entry(elem)
+        elem.clear()
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+        seen += 1
+        published = entry["published"]
+        if (
+            cutoff
+            and published
+            and datetime.strptime(published, TIMESTAMP_FORMAT) < cutoff
+        ):
+            stale += 1
+        else:
+            stale = 0
+            yield entry
+
+        if seen >= max_entries or (stale_limit and stale >= stale_limit):
+            return
@@ -0,0 +1,57 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class HNItemCache:
+    def __init__(self, cache_file: str, ttl_seconds: float = 1800):
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.items = self._load()
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+
+    def get(self, story_id: int, cutoff_timestamp: float) -> Optional[Dict]:
+        with self._lock:
+            cached = self.items.get(str(story_id))
+        if not cached:
+            return None
+
+        story = cached["story"]
+        if story.get("time", 0) < cutoff_timestamp:
+            return story
+        if time.time() - cached["fetched_at"] < self.ttl_seconds:
+            return story
+        return None
+
+    def put(self, story_id: int, story: Dict):
+        with self._lock:
+            self.items[str(story_id)] = {"story": story, "fetched_at": time.time()}
+
+    def prune(self, cutoff_timestamp: float):
+        with self._lock:
+            expired = [
+                story_id
+                for story_id, cached in self.items.items()
+                if cached["story"].get("time", 0) < cutoff_timestamp
+            ]
+            for story_id in expired:
+                del self.items[story_id]
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = self.cache_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.items, f)
+            os.replace(tmp_file, self.cache_file)
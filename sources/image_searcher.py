@@ -1,11 +1,14 @@
-import requests
 import urllib.parse
 import re
 from typing import List
 
+import metrics
+from http_client import get_http_client
+
 
 class ImageSearcher:
     def __init__(self):
+        self.http = get_http_client()
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
@@ -17,7 +20,7 @@ class ImageSearcher:
         try:
             encoded_keyword = urllib.parse.quote(keyword)
             search_url = f"https://image.baidu.com/search/acjson?tn=resultjson_com&word={encoded_keyword}&rn={max_images * 3}"
-            response = requests.get(search_url, headers=self.headers, timeout=20)
+            response = self.http.get(search_url, headers=self.headers, timeout=20)
 
             print(f"          百度HTTP状态: {response.status_code}")
 
@@ -71,7 +74,7 @@ class ImageSearcher:
                 "Accept": "text/html",
             }
 
-            response = requests.get(search_url, headers=headers, timeout=30)
+            response = self.http.get(search_url, headers=headers, timeout=30)
             print(
                 f"          Google HTTP状态: {response.status_code}, 响应长度: {len(response.text)}"
             )
@@ -130,7 +133,7 @@ class ImageSearcher:
             encoded_term = urllib.parse.quote(f"{topic} diagram")
             search_url = f"https://en.wikipedia.org/w/api.php?action=query&list=search&srsearch={encoded_term}&srnamespace=6&srlimit=15&format=json&origin=*"
 
-            response = requests.get(search_url, headers=self.headers, timeout=30)
+            response = self.http.get(search_url, headers=self.headers, timeout=30)
             print(f"          Wikipedia HTTP状态: {response.status_code}")
 
             if response.status_code == 200:
@@ -176,7 +179,7 @@ class ImageSearcher:
             encoded_term = urllib.parse.quote(f"{topic} diagram")
             search_url = f"https://commons.wikimedia.org/w/api.php?action=query&list=search&srsearch={encoded_term}&srnamespace=6&srlimit=15&format=json&origin=*"
 
-            response = requests.get(search_url, headers=self.headers, timeout=30)
+            response = self.http.get(search_url, headers=self.headers, timeout=30)
             print(f"          Wikimedia HTTP状态: {response.status_code}")
 
             if response.status_code == 200:
@@ -207,7 +210,7 @@ class ImageSearcher:
         try:
             encoded_filename = urllib.parse.quote(filename)
             url = f"https://{domain}/w/api.php?action=query&titles=File:{encoded_filename}&prop=imageinfo&iiprop=url&format=json&origin=*"
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = self.http.get(url, headers=self.headers, timeout=30)
 
             if response.status_code == 200:
                 data = response.json()
@@ -250,5 +253,7 @@ class ImageSearcher:
 
 
 def search_images_for_topic(topic: str) -> List[str]:
-    searcher = ImageSearcher()
-    return searcher.search_concept_images(topic)
+    with metrics.span("images.search", topic=topic):
+        images = ImageSearcher().search_concept_images(topic)
+        metrics.count("images.found", len(images))
+        return images
@@ -0,0 +1,131 @@
+import os
+import re
+import zlib
+from itertools import chain
+from typing import List, Tuple
+
+import numpy as np
+import yaml
+
+from data_paths import get_data_dir
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]{3,}")
+
+
+def _get_config_path(config_path: str = "config.yaml") -> str:
+    if os.path.isabs(config_path):
+        return config_path
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, config_path)
+
+
+def _tokens(text: str) -> List[str]:
+    if not CJK_PATTERN.search(text):
+        return TOKEN_PATTERN.findall(text.lower())
+
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token[0] >= "\u4e00" and len(token) > 2:
+            tokens.extend(token[i : i + 2] for i in range(len(token) - 1))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def hash_features(
+    texts: List[str], dim: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    token_lists = [_tokens(text) for text in texts]
+    lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64)
+    if not lengths.sum():
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+
+    tokens = list(chain.from_iterable(token_lists))
+    vocab = {
+        token: zlib.crc32(token.encode("utf-8")) for token in dict.fromkeys(tokens)
+    }
+    unigrams = np.fromiter(
+        map(vocab.__getitem__, tokens), dtype=np.uint64, count=len(tokens)
+    )
+    rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    same_row = rows[:-1] == rows[1:]
+    bigrams = (unigrams[:-1] * np.uint64(1000003) ^ unigrams[1:]) & np.uint64(
+        0xFFFFFFFF
+    )
+
+    hashes = np.concatenate([unigrams, bigrams[same_row]]).astype(np.int64)
+    rows = np.concatenate([rows, rows[:-1][same_row]])
+    columns = hashes % dim
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+
+    keys, key_inverse = np.unique(rows * dim + columns, return_inverse=True)
+    counts = np.bincount(key_inverse, weights=signs)
+    values = np.sign(counts) * np.log1p(np.abs(counts))
+
+    rows, columns = keys // dim, keys % dim
+    norms = np.sqrt(np.bincount(rows, weights=values**2, minlength=len(texts)))
+    values = values / np.where(norms > 0, norms, 1.0)[rows]
+    return rows, columns, values.astype(np.float32)
+
+
+class InterestProfile:
+    def __init__(self, config_path: str = "config.yaml", kind: str = "papers"):
+        config_file = _get_config_path(config_path)
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+
+        profile_config = config.get("interest_profile", {})
+        self.enabled = profile_config.get("enabled", True)
+        self.dim = profile_config.get("dim", 2**18)
+        self.decay = profile_config.get("decay", 0.9)
+        self.weight = profile_config.get(f"{kind}_weight", 10)
+
+        data_dir = get_data_dir(os.path.dirname(config_file))
+        os.makedirs(data_dir, exist_ok=True)
+        self.profile_file = os.path.join(data_dir, f"interest_profile_{kind}.npy")
+        self.vector = self._load()
+
+    def _load(self) -> np.ndarray:
+        if os.path.exists(self.profile_file):
+            try:
+                vector = np.load(self.profile_file)
+                if vector.shape == (self.dim,):
+                    return vector.astype(np.float32)
+                print(f"  兴趣画像维度变更, 重新累积: {self.profile_file}")
+            except (OSError, ValueError) as e:
+                print(f"  兴趣画像读取失败: {e}")
+        return np.zeros(self.dim, dtype=np.float32)
+
+    def save(self):
+        tmp_file = self.profile_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            np.save(f, self.vector)
+        os.replace(tmp_file, self.profile_file)
+
+    def score(self, texts: List[str]) -> np.ndarray:
+        scores = np.zeros(len(texts), dtype=np.float32)
+        norm = float(np.linalg.norm(self.vector))
+        if not self.enabled or not texts or norm == 0:
+            return scores
+
+        rows, columns, values = hash_features(texts, self.dim)
+        scores += np.bincount(
+            rows, weights=values * self.vector[columns], minlength=len(texts)
+        ).astype(np.float32)
+        return scores / norm
+
+    def bonus(self, texts: List[str]) -> np.ndarray:
+        return self.weight * self.score(texts)
+
+    def update(self, texts: List[str]):
+        if not self.enabled or not texts:
+            return
+
+        _, columns, values = hash_features(texts, self.dim)
+        centroid = np.bincount(columns, weights=values, minlength=self.dim)
+        self.vector = (
+            self.decay * self.vector + (1 - self.decay) * centroid / len(texts)
+        ).astype(np.float32)
+        self.save()
@@ -0,0 +1,215 @@
+import json
+import os
+import re
+import zlib
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import yaml
+
+from data_paths import get_data_dir
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[一-鿿]+")
+PRIME = np.uint64(4294967291)
+
+
+def _get_config_path(config_path: str = "config.yaml") -> str:
+    if os.path.isabs(config_path):
+        return config_path
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, config_path)
+
+
+def shingles(text: str) -> Set[str]:
+    result = set()
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token[0] < "一" or len(token) < 2:
+            result.add(token)
+        else:
+            result.update(token[i : i + 2] for i in range(len(token) - 1))
+    return result
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, int(PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, int(PRIME), size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        tokens = shingles(text)
+        if not tokens:
+            return None
+        hashes = np.fromiter(
+            (zlib.crc32(token.encode("utf-8")) for token in tokens),
+            dtype=np.uint64,
+            count=len(tokens),
+        )
+        return ((self.a * hashes + self.b) % PRIME).min(axis=1).astype(np.uint32)
+
+    def encode(self, signature: np.ndarray) -> str:
+        return signature.astype(">u4").tobytes().hex()
+
+    def decode(self, value: str) -> Optional[np.ndarray]:
+        try:
+            signature = np.frombuffer(bytes.fromhex(value), dtype=">u4")
+        except ValueError:
+            return None
+        if len(signature) != self.num_perm:
+            return None
+        return signature.astype(np.uint32)
+
+
+class MinHashIndex:
+    def __init__(self, num_perm: int = 128, band_rows: int = 4, threshold: float = 0.4):
+        self.band_rows = band_rows
+        self.bands = num_perm // band_rows
+        self.threshold = threshold
+        self.tables: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self.signatures: List[np.ndarray] = []
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.band_rows : (band + 1) * self.band_rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, signature: np.ndarray) -> int:
+        index = len(self.signatures)
+        self.signatures.append(signature)
+        for band, key in enumerate(self._band_keys(signature)):
+            self.tables[band].setdefault(key, []).append(index)
+        return index
+
+    def candidates(self, signature: np.ndarray) -> List[int]:
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self.tables[band].get(key, ()))
+        return sorted(candidates)
+
+    def query(self, signature: np.ndarray) -> List[int]:
+        return [
+            index
+            for index in self.candidates(signature)
+            if np.mean(self.signatures[index] == signature) >= self.threshold
+        ]
+
+
+class NearDuplicateFilter:
+    def __init__(self, config_path: str = "config.yaml"):
+        config_file = _get_config_path(config_path)
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+
+        dedup_config = config.get("news", {}).get("near_dedup", {})
+        self.enabled = dedup_config.get("enabled", True)
+        self.threshold = dedup_config.get("threshold", 0.4)
+        self.band_rows = dedup_config.get("band_rows", 4)
+        self.history_days = dedup_config.get("history_days", 3)
+        self.hasher = MinHasher(dedup_config.get("num_perm", 128))
+
+        data_dir = get_data_dir(os.path.dirname(config_file))
+        self.history_file = os.path.join(data_dir, "news_fingerprints.json")
+        self.history = self._load_history()
+
+    def _load_history(self) -> Dict[str, List[str]]:
+        if os.path.exists(self.history_file):
+            try:
+                with open(self.history_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+
+    def _new_index(self) -> MinHashIndex:
+        return MinHashIndex(self.hasher.num_perm, self.band_rows, self.threshold)
+
+    def _history_index(self) -> MinHashIndex:
+        today = datetime.now().strftime("%Y-%m-%d")
+        cutoff = (datetime.now() - timedelta(days=self.history_days)).strftime(
+            "%Y-%m-%d"
+        )
+        index = self._new_index()
+        for date, values in self.history.items():
+            if cutoff <= date < today:
+                for value in values:
+                    signature = self.hasher.decode(value)
+                    if signature is not None:
+                        index.add(signature)
+        return index
+
+    def filter(
+        self,
+        items: List[Dict],
+        text_fn: Callable[[Dict], str],
+        score_fn: Callable[[Dict], float],
+    ) -> List[Dict]:
+        if not self.enabled or not items:
+            return items
+
+        signatures = [self.hasher.signature(text_fn(item)) for item in items]
+        history_index = self._history_index()
+
+        parent = list(range(len(items)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        index = self._new_index()
+        positions: List[int] = []
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            for j in index.query(signature):
+                root_i, root_j = find(i), find(positions[j])
+                if root_i != root_j:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+            index.add(signature)
+            positions.append(i)
+
+        best: Dict[int, int] = {}
+        for i in range(len(items)):
+            root = find(i)
+            if root not in best or score_fn(items[i]) > score_fn(items[best[root]]):
+                best[root] = i
+
+        kept = []
+        for i in sorted(best.values()):
+            item = dict(items[i])
+            if signatures[i] is not None:
+                if history_index.query(signatures[i]):
+                    continue
+                item["minhash"] = self.hasher.encode(signatures[i])
+            kept.append(item)
+
+        removed = len(items) - len(kept)
+        if removed:
+            print(f"  近似去重: 移除 {removed} 条")
+        return kept
+
+    def remember(self, items: Iterable[Dict]):
+        if not self.enabled:
+            return
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        cutoff = (datetime.now() - timedelta(days=self.history_days)).strftime(
+            "%Y-%m-%d"
+        )
+        signatures = set(self.history.get(today, []))
+        signatures.update(item["minhash"] for item in items if item.get("minhash"))
+
+        self.history = {
+            date: values for date, values in self.history.items() if date >= cutoff
+        }
+        self.history[today] = sorted(signatures)
+
+        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+        tmp_file = self.history_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.history, f, indent=2)
+        os.replace(tmp_file, self.history_file)
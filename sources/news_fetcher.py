@@ -1,13 +1,31 @@
 import feedparser
-import requests
+from lxml import etree
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
+from urllib.parse import urlparse
+import threading
 import yaml
 import re
 import time
 import os
 import hashlib
 
+import metrics
+from data_paths import get_data_dir
+from http_client import get_http_client
+from sources.feed_cache import FeedCache
+from sources.feed_stream import TIMESTAMP_FORMAT, TeeReader, iter_feed_entries
+from sources.hn_cache import HNItemCache
+from sources.interest_profile import InterestProfile
+from sources.near_dedup import NearDuplicateFilter
+from sources.seen_store import SeenStore
+
+TECH_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in [r"\d+b", r"\d+x", r"sota", r"新架构", r"新算法", r"突破"]
+]
+
 
 def _get_config_path(config_path: str = "config.yaml") -> str:
     if os.path.isabs(config_path):
@@ -16,19 +34,67 @@ def _get_config_path(config_path: str = "config.yaml") -> str:
     return os.path.join(project_root, config_path)
 
 
+class HostThrottle:
+    def __init__(self, min_interval: float = 0.3):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._last_request: Dict[str, float] = {}
+
+    def wait(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+
+        with host_lock:
+            last = self._last_request.get(host)
+            if last is not None:
+                delay = self.min_interval - (time.monotonic() - last)
+                if delay > 0:
+                    time.sleep(delay)
+            self._last_request[host] = time.monotonic()
+
+
 class NewsFetcher:
     def __init__(self, config_path: str = "config.yaml"):
-        with open(_get_config_path(config_path), "r", encoding="utf-8") as f:
+        config_file = _get_config_path(config_path)
+        with open(config_file, "r", encoding="utf-8") as f:
             config = yaml.safe_load(f)
 
+        self.data_dir = get_data_dir(os.path.dirname(config_file))
+        self.http = get_http_client(config_file)
+        self.seen_store = SeenStore(config_file)
+        self.interest = InterestProfile(config_file, kind="news")
+
         news_config = config["news"]
         self.rss_sources = news_config.get("rss_sources", [])
         self.use_hackernews = news_config.get("hackernews", False)
+        hn_options = news_config.get("hackernews_options", {})
+        self.hn_top_n = hn_options.get("top_n", 30)
+        self.hn_min_score = hn_options.get("min_score", 100)
+        self.hn_max_workers = max(1, hn_options.get("max_workers", 10))
+        self.hn_cache = HNItemCache(
+            os.path.join(self.data_dir, "hn_cache.json"),
+            ttl_seconds=hn_options.get("cache_ttl_minutes", 30) * 60,
+        )
         self.search_keywords = [
             kw.lower() for kw in news_config.get("search_keywords", [])
         ]
         self.max_news = news_config.get("max_news", 8)
 
+        fetch_config = news_config.get("fetch", {})
+        self.max_workers = max(1, fetch_config.get("max_workers", 6))
+        self.throttle = HostThrottle(fetch_config.get("per_host_interval", 0.3))
+        self.stream_parse = fetch_config.get("stream_parse", True)
+        self.max_entries = fetch_config.get("max_entries", 30)
+        self.stale_limit = fetch_config.get("stale_limit", 5)
+        self.newest_first = fetch_config.get("newest_first", True)
+        self.feed_cache = None
+        if fetch_config.get("conditional_get", True):
+            self.feed_cache = FeedCache(os.path.join(self.data_dir, "feed_cache.json"))
+
+        self.near_dedup = NearDuplicateFilter(config_file)
+
         quality_filter = news_config.get("quality_filter", {})
         self.high_value_keywords = [
             kw.lower() for kw in quality_filter.get("high_value_keywords", [])
@@ -61,9 +127,8 @@ class NewsFetcher:
             if kw in text:
                 score += 10
 
-        tech_patterns = [r"\d+b", r"\d+x", r"sota", r"新架构", r"新算法", r"突破"]
-        for pattern in tech_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        for pattern in TECH_PATTERNS:
+            if pattern.search(text):
                 score += 15
 
         return score
@@ -76,31 +141,132 @@ class NewsFetcher:
     def _get_content_hash(self, title: str) -> str:
         return hashlib.md5(title.encode()).hexdigest()[:8]
 
+    def _parse_feed_entries(self, content: bytes) -> List[Dict]:
+        feed = feedparser.parse(content)
+        entries = []
+
+        for entry in feed.entries[: self.max_entries]:
+            try:
+                published = None
+                if hasattr(entry, "published_parsed") and entry.published_parsed:
+                    published = datetime(*entry.published_parsed[:6])
+                elif hasattr(entry, "updated_parsed") and entry.updated_parsed:
+                    published = datetime(*entry.updated_parsed[:6])
+
+                entries.append(
+                    {
+                        "title": str(entry.get("title", "") or ""),
+                        "summary": str(
+                            entry.get("summary", entry.get("description", "")) or ""
+                        ),
+                        "link": entry.get("link", ""),
+                        "published": (
+                            published.strftime(TIMESTAMP_FORMAT) if published else None
+                        ),
+                    }
+                )
+            except Exception:
+                continue
+
+        return entries
+
+    def _stream_feed_entries(self, response, source: Dict) -> List[Dict]:
+        response.raw.decode_content = True
+        reader = TeeReader(response.raw)
+        cutoff_date = datetime.now() - timedelta(days=2)
+        newest_first = source.get("newest_first", self.newest_first)
+        start = time.perf_counter()
+
+        try:
+            return list(
+                iter_feed_entries(
+                    reader,
+                    max_entries=self.max_entries,
+                    cutoff=cutoff_date,
+                    stale_limit=self.stale_limit if newest_first else 0,
+                )
+            )
+        except etree.XMLSyntaxError as e:
+            print(f"  [{source['name']}] XML解析失败, 改用feedparser: {e}")
+            metrics.count("news.feed_fallbacks")
+            return self._parse_feed_entries(reader.read_all())
+        finally:
+            metrics.count("http.bytes", reader.bytes_read)
+            metrics.count("http.stream_seconds", time.perf_counter() - start)
+            reader.release()
+            response.close()
+
+    def _load_feed_entries(self, source: Dict) -> List[Dict]:
+        url = source["rss_url"]
+        return self.http.coalesce(
+            ("feed", url), lambda: self._download_feed(source), cacheable=bool
+        )
+
+    def _download_feed(self, source: Dict) -> List[Dict]:
+        url = source["rss_url"]
+        headers = dict(self.headers)
+        if self.feed_cache:
+            headers.update(self.feed_cache.conditional_headers(url))
+
+        self.throttle.wait(url)
+        response = self.http.get(
+            url, headers=headers, timeout=15, coalesce=False, stream=self.stream_parse
+        )
+
+        if response.status_code == 304 and self.feed_cache:
+            entries = self.feed_cache.get_entries(url)
+            if entries is not None:
+                response.close()
+                print(f"  [{source['name']}] 未更新, 使用缓存")
+                metrics.count("news.feed_cache_hits")
+                return entries
+            response.close()
+            response = self.http.get(
+                url,
+                headers=self.headers,
+                timeout=15,
+                coalesce=False,
+                stream=self.stream_parse,
+            )
+
+        if self.stream_parse and response.status_code == 200:
+            entries = self._stream_feed_entries(response, source)
+        else:
+            entries = self._parse_feed_entries(response.content)
+            if self.stream_parse:
+                metrics.count("http.bytes", len(response.content))
+
+        if self.feed_cache and response.status_code == 200:
+            self.feed_cache.update(
+                url,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                entries,
+            )
+
+        return entries
+
     def _fetch_from_rss(self, source: Dict) -> List[Dict]:
         news_list = []
 
         try:
-            response = requests.get(source["rss_url"], headers=self.headers, timeout=15)
-            feed = feedparser.parse(response.content)
+            entries = self._load_feed_entries(source)
 
             cutoff_date = datetime.now() - timedelta(days=2)
 
-            for entry in feed.entries[:30]:
+            for entry in entries:
                 try:
                     published = None
-                    if hasattr(entry, "published_parsed") and entry.published_parsed:
-                        published = datetime(*entry.published_parsed[:6])
-                    elif hasattr(entry, "updated_parsed") and entry.updated_parsed:
-                        published = datetime(*entry.updated_parsed[:6])
+                    if entry.get("published"):
+                        published = datetime.strptime(
+                            entry["published"], TIMESTAMP_FORMAT
+                        )
 
                     if published and published < cutoff_date:
                         continue
 
-                    title = str(entry.get("title", "") or "")
-                    summary = str(
-                        entry.get("summary", entry.get("description", "")) or ""
-                    )
-                    summary = self._clean_html(summary)
+                    title = entry["title"]
+                    summary = self._clean_html(entry["summary"])
 
                     if not self._is_ai_related(title, summary):
                         continue
@@ -119,9 +285,11 @@ class NewsFetcher:
                         "url": link,
                         "source": source["name"],
                         "source_type": source.get("type", "unknown"),
-                        "published": published.strftime("%Y-%m-%d %H:%M")
-                        if published
-                        else datetime.now().strftime("%Y-%m-%d"),
+                        "published": (
+                            published.strftime("%Y-%m-%d %H:%M")
+                            if published
+                            else datetime.now().strftime("%Y-%m-%d")
+                        ),
                         "content_hash": self._get_content_hash(title),
                         "quality_score": quality_score,
                     }
@@ -137,33 +305,59 @@ class NewsFetcher:
 
         return news_list
 
+    def _get_hn_story(self, story_id: int, cutoff_timestamp: float) -> Optional[Dict]:
+        story = self.hn_cache.get(story_id, cutoff_timestamp)
+        if story is not None:
+            return story
+
+        try:
+            story_url = f"https://hacker-news.firebaseio.com/v0/item/{story_id}.json"
+            story_response = self.http.get(story_url, timeout=5)
+
+            if story_response.status_code != 200:
+                return None
+
+            story = story_response.json()
+        except Exception:
+            return None
+
+        if story:
+            self.hn_cache.put(story_id, story)
+        return story
+
     def _fetch_from_hackernews(self) -> List[Dict]:
         news_list = []
 
         try:
             top_stories_url = "https://hacker-news.firebaseio.com/v0/topstories.json"
-            response = requests.get(top_stories_url, timeout=10)
+            response = self.http.get(top_stories_url, timeout=10)
 
             if response.status_code != 200:
                 print(f"  [Hacker News] 请求失败: {response.status_code}")
                 return news_list
 
-            story_ids = response.json()[:30]
+            story_ids = response.json()[: self.hn_top_n]
 
             cutoff_date = datetime.now() - timedelta(days=2)
-
-            for story_id in story_ids:
-                try:
-                    story_url = (
-                        f"https://hacker-news.firebaseio.com/v0/item/{story_id}.json"
+            cutoff_timestamp = cutoff_date.timestamp()
+
+            with ThreadPoolExecutor(max_workers=self.hn_max_workers) as executor:
+                stories = list(
+                    executor.map(
+                        metrics.propagate(
+                            lambda story_id: self._get_hn_story(
+                                story_id, cutoff_timestamp
+                            )
+                        ),
+                        story_ids,
                     )
-                    story_response = requests.get(story_url, timeout=5)
-
-                    if story_response.status_code != 200:
-                        continue
+                )
 
-                    story = story_response.json()
+            self.hn_cache.prune(cutoff_timestamp - 2 * 86400)
+            self.hn_cache.save()
 
+            for story_id, story in zip(story_ids, stories):
+                try:
                     if not story:
                         continue
 
@@ -177,7 +371,7 @@ class NewsFetcher:
                         continue
 
                     score = story.get("score", 0)
-                    if score < 100:
+                    if score < self.hn_min_score:
                         continue
 
                     url = story.get("url", "")
@@ -211,25 +405,54 @@ class NewsFetcher:
         print("\n开始抓取新闻...")
         all_news = []
 
-        for source in self.rss_sources:
-            news = self._fetch_from_rss(source)
-            all_news.extend(news)
-            time.sleep(0.3)
+        def fetch_rss(source: Dict) -> List[Dict]:
+            with metrics.span("news.rss", source=source["name"]):
+                news = self._fetch_from_rss(source)
+                metrics.count("news.items", len(news))
+                return news
+
+        if self.rss_sources:
+            workers = min(self.max_workers, len(self.rss_sources))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(metrics.propagate(fetch_rss), self.rss_sources)
+                for news in results:
+                    all_news.extend(news)
+
+            if self.feed_cache:
+                self.feed_cache.save()
 
         if self.use_hackernews:
-            news = self._fetch_from_hackernews()
+            with metrics.span("news.hackernews"):
+                news = self._fetch_from_hackernews()
+                metrics.count("news.items", len(news))
             all_news.extend(news)
 
+        unseen_news = self.seen_store.filter_news(all_news)
+        if len(unseen_news) < len(all_news):
+            print(f"  已推送过: 跳过 {len(all_news) - len(unseen_news)} 条")
+
         seen = set()
         unique_news = []
-        for news in all_news:
+        for news in unseen_news:
             key = news.get("content_hash", "") + news["title"].lower()[:20]
             if key not in seen:
                 seen.add(key)
                 unique_news.append(news)
 
-        unique_news.sort(key=lambda x: x.get("quality_score", 0), reverse=True)
+        unique_news = self.near_dedup.filter(
+            unique_news,
+            text_fn=lambda x: x["title"] + " " + x.get("summary", ""),
+            score_fn=lambda x: x.get("quality_score", 0),
+        )
 
+        if unique_news:
+            bonus = self.interest.bonus(
+                [x["title"] + " " + x.get("summary", "") for x in unique_news]
+            )
+            for news, extra in zip(unique_news, bonus):
+                news["quality_score"] = news.get("quality_score", 0) + int(round(extra))
+
+        unique_news.sort(key=lambda x: x.get("quality_score", 0), reverse=True)
         return unique_news[: self.max_news]
 
 
@@ -0,0 +1,178 @@
+import math
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = set(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "their this to was we were which with our these can".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class PaperIndex:
+    def __init__(
+        self,
+        db_file: str,
+        k1: float = 1.2,
+        b: float = 0.75,
+        title_boost: int = 2,
+    ):
+        self.db_file = db_file
+        self.k1 = k1
+        self.b = b
+        self.title_boost = title_boost
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS index_docs ("
+                "arxiv_id TEXT PRIMARY KEY, length INTEGER NOT NULL, "
+                "published TEXT NOT NULL, updated TEXT)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_docs_published ON index_docs(published)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS index_postings ("
+                "term TEXT NOT NULL, arxiv_id TEXT NOT NULL, tf INTEGER NOT NULL, "
+                "PRIMARY KEY (term, arxiv_id)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_postings_doc ON index_postings(arxiv_id)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file, timeout=30)
+
+    def _doc_terms(self, title: str, summary: str) -> Counter:
+        terms = Counter(tokenize(summary))
+        for token in tokenize(title):
+            terms[token] += self.title_boost
+        return terms
+
+    def sync(self, batch_size: int = 2000) -> int:
+        indexed = 0
+        last_rowid = 0
+        with closing(self._connect()) as conn:
+            while True:
+                rows = conn.execute(
+                    "SELECT p.rowid, p.arxiv_id, p.title, p.summary, p.published, "
+                    "p.updated, d.arxiv_id FROM papers p "
+                    "LEFT JOIN index_docs d ON d.arxiv_id = p.arxiv_id "
+                    "WHERE p.rowid > ? AND (d.arxiv_id IS NULL OR d.updated IS NOT p.updated) "
+                    "ORDER BY p.rowid LIMIT ?",
+                    (last_rowid, batch_size),
+                ).fetchall()
+                if not rows:
+                    break
+                last_rowid = rows[-1][0]
+
+                postings = []
+                docs = []
+                stale = []
+                for _, arxiv_id, title, summary, published, updated, indexed_id in rows:
+                    terms = self._doc_terms(title, summary)
+                    postings.extend((term, arxiv_id, tf) for term, tf in terms.items())
+                    docs.append((arxiv_id, sum(terms.values()), published, updated))
+                    if indexed_id is not None:
+                        stale.append((arxiv_id,))
+
+                with conn:
+                    conn.executemany(
+                        "DELETE FROM index_postings WHERE arxiv_id = ?", stale
+                    )
+                    conn.executemany(
+                        "INSERT INTO index_postings (term, arxiv_id, tf) VALUES (?, ?, ?)",
+                        postings,
+                    )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO index_docs "
+                        "(arxiv_id, length, published, updated) VALUES (?, ?, ?, ?)",
+                        docs,
+                    )
+                indexed += len(rows)
+        return indexed
+
+    def _query_terms(self, profile: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+        weights: Dict[str, float] = defaultdict(float)
+        for phrase, weight in profile:
+            for token in set(tokenize(phrase)):
+                weights[token] += weight
+        return dict(weights)
+
+    def rank(
+        self,
+        profile: Iterable[Tuple[str, float]],
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, float, List[str]]]:
+        weights = self._query_terms(profile)
+        if not weights:
+            return []
+
+        terms = sorted(weights)
+        placeholders = ",".join("?" * len(terms))
+
+        with closing(self._connect()) as conn:
+            total_docs, avg_length = conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM index_docs"
+            ).fetchone()
+            if not total_docs:
+                return []
+
+            doc_freq = dict(
+                conn.execute(
+                    f"SELECT term, COUNT(*) FROM index_postings "
+                    f"WHERE term IN ({placeholders}) GROUP BY term",
+                    terms,
+                ).fetchall()
+            )
+
+            if since is None:
+                postings = conn.execute(
+                    "SELECT ip.term, ip.arxiv_id, ip.tf, d.length FROM index_postings ip "
+                    "JOIN index_docs d ON d.arxiv_id = ip.arxiv_id "
+                    f"WHERE ip.term IN ({placeholders})",
+                    terms,
+                ).fetchall()
+            else:
+                postings = conn.execute(
+                    "SELECT ip.term, ip.arxiv_id, ip.tf, d.length FROM index_docs d "
+                    "CROSS JOIN index_postings ip ON ip.arxiv_id = d.arxiv_id "
+                    f"WHERE d.published >= ? AND ip.term IN ({placeholders})",
+                    [since.strftime("%Y-%m-%d %H:%M:%S")] + terms,
+                ).fetchall()
+
+        idf = {
+            term: weights[term] * math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+        k1, b = self.k1, self.b
+        scores: Dict[str, float] = defaultdict(float)
+        matched: Dict[str, List[str]] = defaultdict(list)
+        for term, arxiv_id, tf, length in postings:
+            norm = k1 * (1 - b + b * length / avg_length)
+            scores[arxiv_id] += idf[term] * tf * (k1 + 1) / (tf + norm)
+            matched[arxiv_id].append(term)
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        if limit:
+            ranked = ranked[:limit]
+        return [
+            (arxiv_id, score, sorted(matched[arxiv_id])) for arxiv_id, score in ranked
+        ]
@@ -0,0 +1,200 @@
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+PAPER_COLUMNS = (
+    "arxiv_id",
+    "version",
+    "title",
+    "summary",
+    "authors",
+    "categories",
+    "url",
+    "pdf_url",
+    "published",
+    "updated",
+    "harvested_at",
+)
+
+
+def split_arxiv_id(arxiv_id: str) -> Tuple[str, str]:
+    m = re.match(r"^(.*?)(v\d+)?$", arxiv_id)
+    return m.group(1), m.group(2) or ""
+
+
+class PaperStore:
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS papers ("
+                "arxiv_id TEXT PRIMARY KEY, version TEXT, title TEXT NOT NULL, "
+                "summary TEXT NOT NULL, authors TEXT NOT NULL, categories TEXT NOT NULL, "
+                "url TEXT, pdf_url TEXT, published TEXT NOT NULL, updated TEXT, "
+                "harvested_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_papers_published ON papers(published)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                "query_key TEXT PRIMARY KEY, published TEXT NOT NULL, "
+                "arxiv_id TEXT NOT NULL, updated_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS harvest_gaps ("
+                "query_key TEXT PRIMARY KEY, cursor_published TEXT NOT NULL, "
+                "cursor_id TEXT NOT NULL, floor_published TEXT, floor_id TEXT)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file, timeout=30)
+
+    def upsert_papers(self, papers: Iterable[Dict]) -> int:
+        harvested_at = datetime.now().strftime(TIMESTAMP_FORMAT)
+        rows = []
+        for paper in papers:
+            base_id, version = split_arxiv_id(paper["arxiv_id"])
+            rows.append(
+                (
+                    base_id,
+                    version,
+                    paper["title"],
+                    paper["summary"],
+                    json.dumps(paper.get("authors", []), ensure_ascii=False),
+                    json.dumps(paper.get("categories", [])),
+                    paper.get("url", ""),
+                    paper.get("pdf_url", ""),
+                    paper["published"],
+                    paper.get("updated") or paper["published"],
+                    harvested_at,
+                )
+            )
+        if not rows:
+            return 0
+
+        with closing(self._connect()) as conn, conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT INTO papers ({', '.join(PAPER_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(PAPER_COLUMNS))}) "
+                "ON CONFLICT(arxiv_id) DO UPDATE SET "
+                "version=excluded.version, title=excluded.title, "
+                "summary=excluded.summary, authors=excluded.authors, "
+                "categories=excluded.categories, url=excluded.url, "
+                "pdf_url=excluded.pdf_url, updated=excluded.updated "
+                "WHERE excluded.updated > papers.updated",
+                rows,
+            )
+            return conn.total_changes - before
+
+    def _row_to_paper(self, row: sqlite3.Row) -> Dict:
+        return {
+            "title": row["title"],
+            "arxiv_id": row["arxiv_id"] + row["version"],
+            "url": row["url"],
+            "pdf_url": row["pdf_url"],
+            "authors": json.loads(row["authors"]),
+            "summary": row["summary"],
+            "published": row["published"][:10],
+            "categories": json.loads(row["categories"]),
+        }
+
+    def papers_since(self, cutoff: datetime) -> List[Dict]:
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM papers WHERE published >= ? ORDER BY published DESC",
+                (cutoff.strftime(TIMESTAMP_FORMAT),),
+            ).fetchall()
+        return [self._row_to_paper(row) for row in rows]
+
+    def get_papers(self, arxiv_ids: List[str]) -> Dict[str, Dict]:
+        papers = {}
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            for start in range(0, len(arxiv_ids), 500):
+                chunk = arxiv_ids[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT * FROM papers WHERE arxiv_id IN ({placeholders})", chunk
+                )
+                for row in rows:
+                    papers[row["arxiv_id"]] = self._row_to_paper(row)
+        return papers
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def get_watermark(self, query_key: str) -> Optional[Tuple[datetime, str]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT published, arxiv_id FROM watermarks WHERE query_key = ?",
+                (query_key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return datetime.strptime(row[0], TIMESTAMP_FORMAT), row[1]
+
+    def set_watermark(self, query_key: str, published: datetime, arxiv_id: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO watermarks "
+                "(query_key, published, arxiv_id, updated_at) VALUES (?, ?, ?, ?)",
+                (
+                    query_key,
+                    published.strftime(TIMESTAMP_FORMAT),
+                    arxiv_id,
+                    datetime.now().strftime(TIMESTAMP_FORMAT),
+                ),
+            )
+
+    def get_gap(
+        self, query_key: str
+    ) -> Optional[Tuple[Tuple[datetime, str], Optional[Tuple[datetime, str]]]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT cursor_published, cursor_id, floor_published, floor_id "
+                "FROM harvest_gaps WHERE query_key = ?",
+                (query_key,),
+            ).fetchone()
+        if row is None:
+            return None
+        cursor = (datetime.strptime(row[0], TIMESTAMP_FORMAT), row[1])
+        floor = None
+        if row[2]:
+            floor = (datetime.strptime(row[2], TIMESTAMP_FORMAT), row[3])
+        return cursor, floor
+
+    def set_gap(
+        self,
+        query_key: str,
+        cursor: Tuple[datetime, str],
+        floor: Optional[Tuple[datetime, str]],
+    ):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO harvest_gaps "
+                "(query_key, cursor_published, cursor_id, floor_published, floor_id) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    query_key,
+                    cursor[0].strftime(TIMESTAMP_FORMAT),
+                    cursor[1],
+                    floor[0].strftime(TIMESTAMP_FORMAT) if floor else None,
+                    floor[1] if floor else None,
+                ),
+            )
+
+    def clear_gap(self, query_key: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM harvest_gaps WHERE query_key = ?", (query_key,))
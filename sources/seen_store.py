@@ -0,0 +1,125 @@
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List
+
+import yaml
+
+from data_paths import get_data_dir
+
+
+def _get_config_path(config_path: str = "config.yaml") -> str:
+    if os.path.isabs(config_path):
+        return config_path
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, config_path)
+
+
+def _arxiv_base_id(arxiv_id: str) -> str:
+    return re.sub(r"v\d+$", "", arxiv_id)
+
+
+def news_keys(item: Dict) -> List[str]:
+    keys = []
+    if item.get("url"):
+        keys.append("url:" + item["url"])
+    if item.get("content_hash"):
+        keys.append("hash:" + item["content_hash"])
+    return keys
+
+
+def paper_keys(paper: Dict) -> List[str]:
+    if paper.get("arxiv_id"):
+        return ["arxiv:" + _arxiv_base_id(paper["arxiv_id"])]
+    return []
+
+
+class SeenStore:
+    def __init__(self, config_path: str = "config.yaml"):
+        config_file = _get_config_path(config_path)
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+
+        store_config = config.get("seen_store", {})
+        self.enabled = store_config.get("enabled", True)
+        self.retention_days = store_config.get("retention_days", 30)
+
+        data_dir = get_data_dir(os.path.dirname(config_file))
+        os.makedirs(data_dir, exist_ok=True)
+        self.db_file = os.path.join(data_dir, "seen_items.db")
+
+        if self.enabled:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS pushed_items ("
+                    "key TEXT PRIMARY KEY, kind TEXT NOT NULL, pushed_at TEXT NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_pushed_at ON pushed_items(pushed_at)"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file, timeout=30)
+
+    def _cutoff(self) -> str:
+        return (datetime.now() - timedelta(days=self.retention_days)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+
+    def _seen_keys(self, keys: List[str]) -> set:
+        seen = set()
+        cutoff = self._cutoff()
+        with closing(self._connect()) as conn, conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    "SELECT key FROM pushed_items "
+                    f"WHERE pushed_at >= ? AND key IN ({placeholders})",
+                    [cutoff] + chunk,
+                )
+                seen.update(row[0] for row in rows)
+        return seen
+
+    def filter_unseen(
+        self, items: List[Dict], key_fn: Callable[[Dict], List[str]]
+    ) -> List[Dict]:
+        if not self.enabled or not items:
+            return items
+
+        item_keys = [key_fn(item) for item in items]
+        seen = self._seen_keys(sorted({key for keys in item_keys for key in keys}))
+        return [
+            item
+            for item, keys in zip(items, item_keys)
+            if not any(key in seen for key in keys)
+        ]
+
+    def filter_news(self, items: List[Dict]) -> List[Dict]:
+        return self.filter_unseen(items, news_keys)
+
+    def filter_papers(self, papers: List[Dict]) -> List[Dict]:
+        return self.filter_unseen(papers, paper_keys)
+
+    def mark_pushed(self, news: Iterable[Dict] = (), papers: Iterable[Dict] = ()):
+        if not self.enabled:
+            return
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [(key, "news", now) for item in news for key in news_keys(item)]
+        rows += [(key, "paper", now) for paper in papers for key in paper_keys(paper)]
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pushed_items (key, kind, pushed_at) VALUES (?, ?, ?)",
+                rows,
+            )
+        self.prune()
+
+    def prune(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM pushed_items WHERE pushed_at < ?", (self._cutoff(),)
+            )
@@ -0,0 +1,127 @@
+import gzip
+import json
+import os
+import shutil
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from sources.arxiv_backfill import (
+    CategoryFilter,
+    _parse_date,
+    backfill,
+    iter_json_records,
+    iter_oai_records,
+)
+from sources.paper_store import PaperStore
+
+JSON_DUMP = os.path.join(FIXTURES_DIR, "arxiv_dump.jsonl")
+OAI_DUMP = os.path.join(FIXTURES_DIR, "arxiv_oai.xml")
+CATEGORIES = ["cs.CL", "cs.AI"]
+
+
+def new_stats():
+    return {"scanned": 0, "kept": 0, "changed": 0, "errors": 0, "bytes": 0}
+
+
+def parse(records, path, categories=CATEGORIES):
+    stats = new_stats()
+    with open(path, "rb") as f:
+        papers = {
+            p["arxiv_id"]: p for p in records(f, CategoryFilter(categories), stats)
+        }
+    return papers, stats
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PaperStore(str(tmp_path / "papers.db"))
+
+
+def test_parse_date_formats():
+    assert _parse_date("Mon, 1 Jan 2024 10:00:00 GMT") == "2024-01-01 10:00:00"
+    assert _parse_date("Tue, 02 Jan 2024 10:00:00 +0800") == "2024-01-02 02:00:00"
+    assert _parse_date("2024-01-03") == "2024-01-03 00:00:00"
+    assert _parse_date("2024-01-03T04:05:06Z") == "2024-01-03 04:05:06"
+    assert _parse_date("not a date") is None
+    assert _parse_date("") is None
+
+
+def test_category_filter_matches_archive_prefix():
+    category_filter = CategoryFilter(["cs.CL", "math"])
+    assert category_filter.matches(["cs.LG", "cs.CL"])
+    assert category_filter.matches(["math.OC"])
+    assert not category_filter.matches(["cs.CV"])
+    assert CategoryFilter([]).matches(["anything"])
+
+
+def test_json_records():
+    papers, stats = parse(iter_json_records, JSON_DUMP)
+    assert sorted(papers) == ["2401.00001v2", "2401.00003"]
+    assert stats == dict(new_stats(), scanned=5, errors=2)
+
+    paper = papers["2401.00001v2"]
+    assert paper["title"] == "LoRA adapters for multilingual models"
+    assert paper["summary"] == "We study low-rank adapters."
+    assert paper["authors"] == ["Jane Smith", "John Doe", "Kim Lee"]
+    assert paper["published"] == "2024-01-01 10:00:00"
+    assert paper["updated"] == "2024-01-03 09:30:00"
+    assert paper["url"] == "http://arxiv.org/abs/2401.00001v2"
+    assert paper["categories"] == ["cs.CL", "cs.LG"]
+
+    paper = papers["2401.00003"]
+    assert paper["authors"] == ["Ann Wu", "Bo Li"]
+    assert paper["published"] == paper["updated"] == "2024-01-04 00:00:00"
+
+
+def test_oai_records():
+    papers, stats = parse(iter_oai_records, OAI_DUMP)
+    assert sorted(papers) == ["2402.00001", "2402.00003v3"]
+    assert stats["scanned"] == 4
+    assert stats["errors"] == 0
+
+    paper = papers["2402.00001"]
+    assert paper["title"] == "Instruction tuning with synthetic data"
+    assert paper["summary"] == "We tune on synthetic instructions."
+    assert paper["authors"] == ["Jane Smith", "Doe"]
+    assert paper["published"] == "2024-02-01 00:00:00"
+    assert paper["updated"] == "2024-02-03 00:00:00"
+
+    paper = papers["2402.00003v3"]
+    assert paper["authors"] == ["Ann Wu", "Bo Li and Cy Ng"]
+    assert paper["published"] == "2024-02-02 12:00:00"
+    assert paper["updated"] == "2024-02-05 08:15:00"
+
+
+def test_oai_records_without_category_filter():
+    papers, _ = parse(iter_oai_records, OAI_DUMP, categories=[])
+    assert "2402.00004" in papers
+
+
+def test_backfill_reads_plain_and_gzipped_dumps(tmp_path, store):
+    gz_dump = str(tmp_path / "arxiv_oai.xml.gz")
+    with open(OAI_DUMP, "rb") as src, gzip.open(gz_dump, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+    stats = backfill([JSON_DUMP, gz_dump], store, CATEGORIES, batch_size=1)
+    assert stats["kept"] == stats["changed"] == 4
+    assert stats["errors"] == 2
+    assert store.count() == 4
+
+
+def test_rerun_only_writes_newer_versions(tmp_path, store):
+    backfill([JSON_DUMP], store, CATEGORIES)
+    stats = backfill([JSON_DUMP], store, CATEGORIES)
+    assert stats["kept"] == 2
+    assert stats["changed"] == 0
+
+    record = json.loads(open(JSON_DUMP, encoding="utf-8").readline())
+    record["versions"].append(
+        {"version": "v3", "created": "Fri, 5 Jan 2024 09:00:00 GMT"}
+    )
+    newer = tmp_path / "newer.jsonl"
+    newer.write_text(json.dumps(record) + "\n", encoding="utf-8")
+    stats = backfill([str(newer)], store, CATEGORIES)
+    assert stats["changed"] == 1
+    assert store.count() == 2
+    assert store.get_papers(["2401.00001"])["2401.00001"]["arxiv_id"] == "2401.00001v3"
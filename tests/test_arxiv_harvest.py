@@ -0,0 +1,132 @@
+import re
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from sources.arxiv_fetcher import ArxivFetcher
+
+QUERY = "(cat:cs.CL)"
+
+
+def make_result(index: int, published: datetime):
+    published = published.replace(second=0, microsecond=0, tzinfo=timezone.utc)
+    return SimpleNamespace(
+        title=f"Paper {index}",
+        entry_id=f"http://arxiv.org/abs/2501.{index:05d}v1",
+        pdf_url=f"http://arxiv.org/pdf/2501.{index:05d}v1",
+        authors=[SimpleNamespace(name="A. Author")],
+        summary="An abstract about language models.",
+        published=published,
+        updated=published,
+        categories=["cs.CL"],
+    )
+
+
+class FakeClient:
+    def __init__(self):
+        self.results_by_id = {}
+        self.queries = []
+
+    def publish(self, count: int, start: datetime, step: timedelta):
+        first = len(self.results_by_id)
+        for i in range(count):
+            result = make_result(first + i, start + i * step)
+            self.results_by_id[result.entry_id] = result
+
+    def results(self, search):
+        self.queries.append(search.query)
+        ordered = sorted(
+            self.results_by_id.values(),
+            key=lambda r: (r.published, r.entry_id),
+            reverse=True,
+        )
+        m = re.search(r"submittedDate:\[(\d{12}) TO (\d{12})\]", search.query)
+        if m:
+            low, high = (
+                datetime.strptime(v, "%Y%m%d%H%M").replace(tzinfo=timezone.utc)
+                for v in m.groups()
+            )
+            ordered = [r for r in ordered if low <= r.published <= high]
+        return iter(ordered[: search.max_results])
+
+
+@pytest.fixture
+def fetcher(write_config):
+    config = {
+        "arxiv": {
+            "categories": ["cs.CL"],
+            "keywords": ["language model"],
+            "max_papers": 5,
+            "days_back": 3,
+            "harvest": {"max_results": 10},
+        }
+    }
+    return ArxivFetcher(write_config(config))
+
+
+def stored_ids(fetcher):
+    return {p["arxiv_id"] for p in fetcher.store.papers_since(datetime(2000, 1, 1))}
+
+
+def test_complete_harvest_moves_watermark(fetcher):
+    client = FakeClient()
+    client.publish(6, datetime.utcnow() - timedelta(hours=10), timedelta(hours=1))
+
+    count, _ = fetcher._harvest(QUERY, client)
+    assert count == 6
+    assert fetcher.store.get_watermark(QUERY)[1] == "2501.00005v1"
+    assert fetcher.store.get_gap(QUERY) is None
+
+    count, _ = fetcher._harvest(QUERY, client)
+    assert count == 0
+
+
+def test_capped_harvest_resumes_from_cursor(fetcher):
+    client = FakeClient()
+    client.publish(25, datetime.utcnow() - timedelta(hours=30), timedelta(hours=1))
+
+    count, _ = fetcher._harvest(QUERY, client)
+    assert count == 10
+    assert fetcher.store.get_watermark(QUERY)[1] == "2501.00024v1"
+    cursor, floor = fetcher.store.get_gap(QUERY)
+    assert cursor[1] == "2501.00015v1"
+    assert floor is None
+
+    client.publish(3, datetime.utcnow() - timedelta(minutes=30), timedelta(minutes=5))
+    fetcher._harvest(QUERY, client)
+    assert {"2501.00025v1", "2501.00026v1", "2501.00027v1"} <= stored_ids(fetcher)
+    assert "submittedDate:[" in client.queries[-1]
+
+    for _ in range(3):
+        fetcher._harvest(QUERY, client)
+    assert stored_ids(fetcher) == {f"2501.{i:05d}v1" for i in range(28)}
+    assert fetcher.store.get_gap(QUERY) is None
+    assert fetcher.store.get_watermark(QUERY)[1] == "2501.00027v1"
+
+
+def test_cap_hit_on_head_keeps_older_gap_floor(fetcher):
+    client = FakeClient()
+    client.publish(5, datetime.utcnow() - timedelta(hours=40), timedelta(hours=1))
+    fetcher._harvest(QUERY, client)
+    watermark = fetcher.store.get_watermark(QUERY)
+
+    client.publish(30, datetime.utcnow() - timedelta(hours=30), timedelta(minutes=30))
+    fetcher._harvest(QUERY, client)
+    cursor, floor = fetcher.store.get_gap(QUERY)
+    assert floor == watermark
+    assert cursor[1] == "2501.00025v1"
+
+    for _ in range(3):
+        fetcher._harvest(QUERY, client)
+    assert len(stored_ids(fetcher)) == 35
+    assert fetcher.store.get_gap(QUERY) is None
+
+
+def test_gap_older_than_cutoff_is_dropped(fetcher):
+    client = FakeClient()
+    fetcher.store.set_gap(
+        QUERY, (datetime.utcnow() - timedelta(days=10), "2401.00001"), None
+    )
+    fetcher._harvest(QUERY, client)
+    assert fetcher.store.get_gap(QUERY) is None
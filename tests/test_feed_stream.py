@@ -0,0 +1,78 @@
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from lxml import etree
+
+import metrics
+from sources.feed_stream import TIMESTAMP_FORMAT, TeeReader, iter_feed_entries
+from sources.news_fetcher import NewsFetcher
+
+
+def rss(items):
+    body = "".join(
+        f"<item><title>{title}</title><link>https://example.com/{i}</link>"
+        f"<pubDate>{published.strftime('%a, %d %b %Y %H:%M:%S +0000')}</pubDate></item>"
+        for i, (title, published) in enumerate(items)
+    )
+    return f"<rss><channel>{body}</channel></rss>".encode("utf-8")
+
+
+class FakeResponse:
+    def __init__(self, content: bytes):
+        self.raw = io.BytesIO(content)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_undefined_entity_raises_instead_of_dropping_text():
+    feed = b"<rss><channel><item><title>x &nbsp; y</title></item></channel></rss>"
+    with pytest.raises(etree.XMLSyntaxError):
+        list(iter_feed_entries(io.BytesIO(feed)))
+
+
+def test_stale_limit_stops_newest_first_feed():
+    now = datetime.utcnow()
+    old = now - timedelta(days=10)
+    feed = rss([("new", now)] + [("old", old)] * 3 + [("late", now)])
+    cutoff = now - timedelta(days=2)
+
+    stopped = list(iter_feed_entries(io.BytesIO(feed), cutoff=cutoff, stale_limit=3))
+    assert [entry["title"] for entry in stopped] == ["new"]
+
+    unordered = list(iter_feed_entries(io.BytesIO(feed), cutoff=cutoff, stale_limit=0))
+    assert [entry["title"] for entry in unordered] == ["new", "late"]
+    assert unordered[0]["published"] == now.strftime(TIMESTAMP_FORMAT)
+
+
+def test_tee_reader_releases_buffer():
+    reader = TeeReader(io.BytesIO(b"abcdef"))
+    reader.read(4)
+    reader.release()
+    reader.read()
+    assert reader.bytes_read == 6
+    assert reader.buffer is None
+
+
+def test_malformed_feed_falls_back_to_feedparser(write_config):
+    fetcher = NewsFetcher(write_config({"news": {}}))
+    feed = (
+        "<rss><channel><item><title>x &nbsp; y</title>"
+        "<link>https://example.com/1</link></item></channel></rss>"
+    ).encode("utf-8")
+    response = FakeResponse(feed)
+    entries = fetcher._stream_feed_entries(response, {"name": "test"})
+    assert [entry["title"] for entry in entries] == ["x \xa0 y"]
+    assert response.closed
+
+
+def test_streamed_feed_counts_bytes_actually_read(write_config, monkeypatch):
+    run = metrics.RunMetrics("test")
+    monkeypatch.setattr(metrics, "_run", run)
+    fetcher = NewsFetcher(write_config({"news": {}}))
+    feed = rss([("new", datetime.utcnow())])
+    fetcher._stream_feed_entries(FakeResponse(feed), {"name": "test"})
+    assert run.root.totals()["http.bytes"] == len(feed)
+    assert "http.stream_seconds" in run.root.totals()
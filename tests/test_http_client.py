@@ -0,0 +1,63 @@
+import metrics
+from http_client import HttpClient
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.content = b"body"
+        self.headers = {"Content-Length": "1000"}
+
+
+def make_client(statuses):
+    client = HttpClient()
+    calls = []
+    statuses = iter(statuses)
+
+    def request(method, url, **kwargs):
+        calls.append(kwargs.get("headers"))
+        return FakeResponse(next(statuses))
+
+    client.session.request = request
+    return client, calls
+
+
+def test_coalesce_reuses_successful_response():
+    client, calls = make_client([200])
+    assert client.get("https://example.com/feed").status_code == 200
+    assert client.get("https://example.com/feed").status_code == 200
+    assert len(calls) == 1
+
+
+def test_coalesce_does_not_cache_errors():
+    client, calls = make_client([503, 200, 200])
+    assert client.get("https://example.com/feed").status_code == 503
+    assert client.get("https://example.com/feed").status_code == 200
+    assert client.get("https://example.com/feed").status_code == 200
+    assert len(calls) == 2
+
+
+def test_coalesce_key_includes_conditional_headers():
+    client, calls = make_client([200, 304, 200])
+    client.get("https://example.com/feed")
+    response = client.get("https://example.com/feed", headers={"If-None-Match": "a"})
+    assert response.status_code == 304
+    client.get("https://example.com/feed", headers={"If-None-Match": "b"})
+    client.get("https://example.com/feed", headers={"User-Agent": "x"})
+    assert len(calls) == 3
+
+
+def test_streamed_request_times_headers_only_and_skips_bytes(monkeypatch):
+    run = metrics.RunMetrics("test")
+    monkeypatch.setattr(metrics, "_run", run)
+    client, _ = make_client([200, 200])
+    client.get("https://example.com/feed", coalesce=False, stream=True)
+    totals = run.root.totals()
+    assert "http.seconds_to_headers" in totals
+    assert "http.seconds" not in totals
+    assert "http.bytes" not in totals
+
+    client.get("https://example.com/other", coalesce=False)
+    totals = run.root.totals()
+    assert "http.seconds" in totals
+    assert totals["http.bytes"] == 4
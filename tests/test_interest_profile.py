@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from sources.interest_profile import InterestProfile, hash_features
+
+LORA = "LoRA fine-tuning for large language models with low-rank adapters"
+VISION = "Diffusion models for high resolution image synthesis"
+ROBOTICS = "Reinforcement learning for legged robot locomotion"
+
+
+@pytest.fixture
+def make_profile(write_config):
+    def make(**options):
+        config = {"interest_profile": dict({"dim": 2**12, "decay": 0.5}, **options)}
+        return InterestProfile(write_config(config), kind="papers")
+
+    return make
+
+
+def test_hash_features_are_unit_length_rows():
+    rows, columns, values = hash_features([LORA, "", "大模型微调方法综述"], 2**12)
+    assert set(rows.tolist()) == {0, 2}
+    assert (columns >= 0).all() and (columns < 2**12).all()
+    for row in (0, 2):
+        assert np.linalg.norm(values[rows == row]) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_hash_features_of_empty_texts():
+    rows, columns, values = hash_features(["", "  "], 2**12)
+    assert len(rows) == len(columns) == len(values) == 0
+
+
+def test_empty_profile_gives_no_bonus(make_profile):
+    assert make_profile().bonus([LORA, VISION]).tolist() == [0.0, 0.0]
+
+
+def test_bonus_ranks_texts_like_pushed_ones_first(make_profile):
+    profile = make_profile(papers_weight=10)
+    profile.update([LORA, "Parameter-efficient fine-tuning of language models"])
+
+    bonus = profile.bonus(
+        [VISION, "QLoRA: efficient fine-tuning of quantized language models", ROBOTICS]
+    )
+    assert bonus[1] > bonus[0]
+    assert bonus[1] > bonus[2]
+    assert bonus[1] <= 10
+
+
+def test_update_persists_between_instances(make_profile):
+    profile = make_profile()
+    profile.update([LORA])
+    assert np.array_equal(make_profile().vector, profile.vector)
+
+
+def test_decay_shrinks_old_interests(make_profile):
+    profile = make_profile(decay=0.5)
+    profile.update([LORA])
+    before = profile.score([LORA])[0]
+    _, lora_columns, _ = hash_features([LORA], profile.dim)
+    old_weights = np.abs(profile.vector[lora_columns]).sum()
+
+    profile.update([VISION])
+    assert np.abs(profile.vector[lora_columns]).sum() < old_weights
+    assert profile.score([LORA])[0] < before
+    assert profile.score([VISION])[0] > profile.score([LORA])[0]
+
+    scores = [profile.score([LORA])[0]]
+    for _ in range(2):
+        profile.update([VISION])
+        scores.append(profile.score([LORA])[0])
+    assert scores[0] > scores[1] > scores[2]
+
+
+def test_disabled_profile_neither_learns_nor_scores(make_profile):
+    profile = make_profile(enabled=False)
+    profile.update([LORA])
+    assert not profile.vector.any()
+    assert profile.bonus([LORA]).tolist() == [0.0]
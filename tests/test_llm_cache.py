@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+import llm_cache
+from llm_cache import LLMCache
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(llm_cache, "time", clock)
+    return clock
+
+
+def key(name: str) -> str:
+    return LLMCache.make_key("qwen-plus", "template", name, {})
+
+
+def test_make_key_depends_on_every_field():
+    base = LLMCache.make_key("qwen-plus", "t", "p", {"temperature": 0.7})
+    assert base == LLMCache.make_key("qwen-plus", "t", "p", {"temperature": 0.7})
+    assert base != LLMCache.make_key("qwen-max", "t", "p", {"temperature": 0.7})
+    assert base != LLMCache.make_key("qwen-plus", "t2", "p", {"temperature": 0.7})
+    assert base != LLMCache.make_key("qwen-plus", "t", "p2", {"temperature": 0.7})
+    assert base != LLMCache.make_key("qwen-plus", "t", "p", {"temperature": 0.1})
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = LLMCache(str(tmp_path), ttl_seconds=3600)
+    cache.put(key("a"), "answer")
+
+    clock.now += 3599
+    assert cache.get(key("a")) == "answer"
+
+    clock.now += 2
+    assert cache.get(key("a")) is None
+    assert not os.path.exists(cache._path(key("a")))
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_get_returns_first_matching_key(tmp_path, clock):
+    cache = LLMCache(str(tmp_path))
+    cache.put(key("b"), "second")
+    assert cache.get(key("a"), key("b")) == "second"
+    assert cache.get(key("a")) is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = LLMCache(str(tmp_path), max_bytes=10_000)
+    cache.put(key("a"), "x" * 3000)
+    size = os.path.getsize(cache._path(key("a")))
+    cache.max_bytes = size * 2
+
+    clock.now += 1
+    cache.put(key("b"), "x" * 3000)
+    clock.now += 1
+    assert cache.get(key("a")) is not None
+    clock.now += 1
+    cache.put(key("c"), "x" * 3000)
+
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")) is not None
+    assert cache.get(key("c")) is not None
+    assert cache.stats["evictions"] == 1
+    assert cache._total_bytes <= cache.max_bytes
+
+
+def test_existing_entries_are_loaded_on_start(tmp_path, clock):
+    LLMCache(str(tmp_path)).put(key("a"), "answer")
+    cache = LLMCache(str(tmp_path))
+    assert len(cache._entries) == 1
+    assert cache.get(key("a")) == "answer"
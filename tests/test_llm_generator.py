@@ -0,0 +1,499 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_generator
+from llm_generator import (
+    PAPER_SECTIONS,
+    DeadlineExceeded,
+    LLMGenerator,
+    Throttled,
+)
+
+PROMPTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts"
+)
+
+MODELS = [
+    {"name": "model-a", "priority": 1},
+    {"name": "model-b", "priority": 2},
+]
+
+
+@pytest.fixture
+def make_generator(write_config, monkeypatch):
+    monkeypatch.delenv("DASHSCOPE_API_KEY", raising=False)
+
+    def make(**llm):
+        config = {
+            "llm": dict(
+                {
+                    "api_key": "test-key",
+                    "models": [dict(model) for model in MODELS],
+                    "streaming": {"enabled": False},
+                    "rate_limit": {"enabled": False},
+                    "health": {"enabled": False},
+                    "cache": {"enabled": False},
+                },
+                **llm,
+            )
+        }
+        generator = LLMGenerator(write_config(config))
+        generator.prompts_dir = PROMPTS_DIR
+        return generator
+
+    return make
+
+
+def test_cache_lookup_checks_every_model_in_chain(make_generator, monkeypatch):
+    generator = make_generator(cache={"enabled": True})
+    params = dict(generator.generation_params)
+    generator.cache.put(
+        generator._cache_key("model-b", "tpl", "prompt", params), "cached answer"
+    )
+    monkeypatch.setattr(
+        generator,
+        "_call_models",
+        lambda *args: pytest.fail("cache hit should not call a model"),
+    )
+    assert generator._call_cached("prompt", "tpl") == "cached answer"
+
+
+def test_cache_miss_calls_models_and_stores_result(make_generator, monkeypatch):
+    generator = make_generator(cache={"enabled": True})
+    calls = []
+
+    def try_model(model_name, prompt, params, started=None, cancelled=None):
+        calls.append(model_name)
+        return "fresh answer"
+
+    monkeypatch.setattr(generator, "_try_model", try_model)
+    assert generator._call_cached("prompt", "tpl") == "fresh answer"
+    assert generator._call_cached("prompt", "tpl") == "fresh answer"
+    assert calls == ["model-a"]
+    assert generator.cache.stats["hits"] == 1
+    assert generator.cache.stats["misses"] == 1
+    assert generator.cache.stats["writes"] == 1
+
+
+def analysis(label: str) -> str:
+    return "\n".join(f"【{section}】\n{label} {section}" for section in PAPER_SECTIONS)
+
+
+def batch_answer(*numbers: int, labels=None) -> str:
+    return "\n".join(
+        f"<<<PAPER {n}>>>\n{analysis((labels or {}).get(n, f'p{n}'))}\n<<<END {n}>>>"
+        for n in numbers
+    )
+
+
+def make_papers(count: int):
+    return [
+        {
+            "title": f"Paper {i}",
+            "authors": ["A. Author"],
+            "summary": "An abstract about language models.",
+            "relevance_score": count - i,
+        }
+        for i in range(count)
+    ]
+
+
+def test_split_batch_analysis_reads_every_section(make_generator):
+    generator = make_generator()
+    analyses = generator._split_batch_analysis(batch_answer(1, 2, 3), 3)
+    assert analyses == {i: analysis(f"p{i + 1}") for i in range(3)}
+
+
+def test_split_batch_analysis_with_missing_markers(make_generator):
+    generator = make_generator()
+    assert generator._split_batch_analysis(analysis("p1"), 2) == {}
+    assert sorted(generator._split_batch_analysis(batch_answer(1, 3), 3)) == [0, 2]
+
+
+def test_split_batch_analysis_with_out_of_order_markers(make_generator):
+    generator = make_generator()
+    analyses = generator._split_batch_analysis(batch_answer(2, 1), 2)
+    assert analyses == {0: analysis("p1"), 1: analysis("p2")}
+
+
+def test_split_batch_analysis_ignores_extra_markers(make_generator):
+    generator = make_generator()
+    text = batch_answer(0, 1, 2, 1, 3, labels={1: "first"}) + "\n<<<PAPER 4>>>"
+    analyses = generator._split_batch_analysis(text, 2)
+    assert analyses == {0: analysis("first"), 1: analysis("p2")}
+
+
+def test_split_batch_analysis_drops_incomplete_sections(make_generator):
+    generator = make_generator()
+    text = batch_answer(1) + "\n<<<PAPER 2>>>\n【主题分类】\n只有一节\n<<<END 2>>>"
+    assert sorted(generator._split_batch_analysis(text, 2)) == [0]
+
+
+def test_unsplittable_batch_answer_is_not_cached(make_generator, monkeypatch):
+    generator = make_generator(cache={"enabled": True})
+    answers = iter(["这不是按格式的回答", batch_answer(1, 2), "unused"])
+    calls = []
+
+    def try_model(model_name, prompt, params, started=None, cancelled=None):
+        calls.append(model_name)
+        return next(answers)
+
+    monkeypatch.setattr(generator, "_try_model", try_model)
+    papers = make_papers(2)
+
+    assert generator.analyze_paper_batch(papers) == [None, None]
+    assert generator.cache.stats["writes"] == 0
+
+    assert generator.analyze_paper_batch(papers) == [analysis("p1"), analysis("p2")]
+    assert generator.cache.stats["writes"] == 1
+
+    assert generator.analyze_paper_batch(papers) == [analysis("p1"), analysis("p2")]
+    assert len(calls) == 2
+
+
+def test_cached_answer_failing_cacheable_is_ignored(make_generator, monkeypatch):
+    generator = make_generator(cache={"enabled": True})
+    params = dict(generator.generation_params)
+    generator.cache.put(
+        generator._cache_key("model-a", "tpl", "prompt", params), batch_answer(1)
+    )
+    monkeypatch.setattr(generator, "_try_model", lambda *args: batch_answer(1, 2))
+
+    def complete(text):
+        return len(generator._split_batch_analysis(text, 2)) == 2
+
+    assert generator._call_cached("prompt", "tpl", cacheable=complete) == (
+        batch_answer(1, 2)
+    )
+    assert generator._call_cached("prompt", "tpl") == batch_answer(1, 2)
+
+
+def test_batched_analysis_falls_back_to_single_papers(make_generator, monkeypatch):
+    generator = make_generator(batch_analysis={"enabled": True, "batch_size": 2})
+    papers = make_papers(3)
+    batches = []
+
+    def analyze_batch(batch):
+        batches.append([paper["title"] for paper in batch])
+        return [f"batch {batch[0]['title']}"] + [None] * (len(batch) - 1)
+
+    singles = []
+
+    def analyze_single(paper):
+        singles.append(paper["title"])
+        return f"single {paper['title']}"
+
+    monkeypatch.setattr(generator, "analyze_paper_batch", analyze_batch)
+    monkeypatch.setattr(generator, "analyze_paper", analyze_single)
+
+    results = generator.analyze_papers(papers, max_papers=3)
+    assert [r["analysis"] for r in results] == [
+        "batch Paper 0",
+        "single Paper 1",
+        "batch Paper 2",
+    ]
+    assert sorted(batches) == [["Paper 0", "Paper 1"], ["Paper 2"]]
+    assert singles == ["Paper 1"]
+
+
+def stream_chunk(text: str, status_code: int = 200, code: str = ""):
+    return SimpleNamespace(
+        status_code=status_code,
+        code=code,
+        message="error" if status_code != 200 else "",
+        output=SimpleNamespace(text=text),
+        usage={"input_tokens": 10, "output_tokens": 2},
+    )
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def stream_generator(make_generator, **streaming):
+    return make_generator(
+        timeout=streaming.pop("timeout", 5),
+        streaming=dict({"enabled": True}, **streaming),
+    )
+
+
+def call_stream(generator, started=None, cancelled=None):
+    return generator._call_with_format(
+        "model-a", "prompt", False, {}, started, cancelled
+    )
+
+
+def test_stream_joins_chunks_and_signals_first_token(make_generator, monkeypatch):
+    generator = stream_generator(make_generator)
+    monkeypatch.setattr(
+        llm_generator.Generation,
+        "call",
+        lambda **kwargs: iter([stream_chunk(""), stream_chunk("a"), stream_chunk("b")]),
+    )
+    started = threading.Event()
+    assert call_stream(generator, started) == (True, "ab")
+    assert started.is_set()
+    assert generator.usage[0]["ttft"] is not None
+
+
+def test_stream_stalled_before_first_token_hits_ttft_deadline(
+    make_generator, monkeypatch, release
+):
+    generator = stream_generator(make_generator, ttft_timeout=0.3, timeout=5)
+
+    def call(**kwargs):
+        release.wait(5)
+        yield stream_chunk("late")
+
+    monkeypatch.setattr(llm_generator.Generation, "call", call)
+    started, cancelled = threading.Event(), threading.Event()
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded, match="首token超时"):
+        call_stream(generator, started, cancelled)
+    assert time.perf_counter() - start < 1.5
+    assert cancelled.is_set()
+    assert not started.is_set()
+
+
+def test_stream_stalled_mid_stream_hits_total_deadline(
+    make_generator, monkeypatch, release
+):
+    generator = stream_generator(make_generator, ttft_timeout=0.3, timeout=0.8)
+
+    def call(**kwargs):
+        yield stream_chunk("a")
+        release.wait(5)
+        yield stream_chunk("late")
+
+    monkeypatch.setattr(llm_generator.Generation, "call", call)
+    started, cancelled = threading.Event(), threading.Event()
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded, match="生成超时"):
+        call_stream(generator, started, cancelled)
+    assert 0.5 < time.perf_counter() - start < 2
+    assert started.is_set()
+    assert cancelled.is_set()
+
+
+@pytest.mark.parametrize(
+    "status_code,code,raises",
+    [(500, "InternalError", None), (429, "Throttling.RateQuota", Throttled)],
+)
+def test_stream_error_chunk_stops_the_pump(
+    make_generator, monkeypatch, status_code, code, raises
+):
+    generator = stream_generator(make_generator)
+    cancelled = threading.Event()
+    consumed = []
+
+    def call(**kwargs):
+        yield stream_chunk("", status_code, code)
+        cancelled.wait(2)
+        for text in ["a", "b", "c"]:
+            consumed.append(text)
+            yield stream_chunk(text)
+
+    monkeypatch.setattr(llm_generator.Generation, "call", call)
+    if raises:
+        with pytest.raises(raises):
+            call_stream(generator, cancelled=cancelled)
+    else:
+        assert call_stream(generator, cancelled=cancelled) == (
+            False,
+            "InternalError - error",
+        )
+    assert cancelled.is_set()
+    time.sleep(0.1)
+    assert consumed == ["a"]
+
+
+def hedged_generator(make_generator, models=3, **hedging):
+    return make_generator(
+        models=[{"name": f"model-{name}", "priority": 1} for name in "abc"[:models]],
+        hedging=dict({"enabled": True, "default_delay": 0.05}, **hedging),
+    )
+
+
+def stub_models(generator, monkeypatch, latencies):
+    launches = {}
+
+    def try_model(model_name, prompt, params, started=None, cancelled=None):
+        launches[model_name] = (time.perf_counter(), cancelled)
+        latency, result, first_token = latencies[model_name]
+        if first_token:
+            started.set()
+        if cancelled.wait(latency):
+            return None
+        return result
+
+    monkeypatch.setattr(generator, "_try_model", try_model)
+    return launches
+
+
+def test_hedge_delay_uses_health_percentile(make_generator):
+    generator = make_generator(
+        hedging={"enabled": True, "default_delay": 7, "min_samples": 3},
+        health={"enabled": True},
+    )
+    assert generator._hedge_delay("model-a") == 7
+    for latency in [1.0, 2.0, 3.0, 4.0]:
+        generator.health.record_success("model-a", "text", latency)
+    assert generator._hedge_delay("model-a") == 4.0
+
+
+def test_hedge_launches_next_model_after_delay_and_cancels_loser(
+    make_generator, monkeypatch
+):
+    generator = hedged_generator(make_generator, models=2)
+    launches = stub_models(
+        generator,
+        monkeypatch,
+        {"model-a": (5, "a", False), "model-b": (0.01, "b", False)},
+    )
+    start = time.perf_counter()
+    assert generator._call_hedged(generator.models, "prompt", {}) == ("model-b", "b")
+    assert time.perf_counter() - start < 1
+    assert launches["model-b"][0] - launches["model-a"][0] >= 0.04
+    assert launches["model-a"][1].is_set()
+    assert generator.hedged_calls == 1
+
+
+def test_fast_first_model_is_not_hedged(make_generator, monkeypatch):
+    generator = hedged_generator(make_generator)
+    launches = stub_models(
+        generator,
+        monkeypatch,
+        {"model-a": (0.01, "a", False), "model-b": (0.01, "b", False)},
+    )
+    assert generator._call_hedged(generator.models, "prompt", {}) == ("model-a", "a")
+    assert list(launches) == ["model-a"]
+    assert generator.hedged_calls == 0
+
+
+def test_streaming_model_past_first_token_is_not_hedged(make_generator, monkeypatch):
+    generator = hedged_generator(make_generator)
+    launches = stub_models(
+        generator,
+        monkeypatch,
+        {"model-a": (0.3, "a", True), "model-b": (0.01, "b", False)},
+    )
+    assert generator._call_hedged(generator.models, "prompt", {}) == ("model-a", "a")
+    assert list(launches) == ["model-a"]
+
+
+def test_failed_model_launches_next_without_hedging(make_generator, monkeypatch):
+    generator = hedged_generator(make_generator, default_delay=5)
+    launches = stub_models(
+        generator,
+        monkeypatch,
+        {
+            "model-a": (0, None, False),
+            "model-b": (0, None, False),
+            "model-c": (0.01, "c", False),
+        },
+    )
+    start = time.perf_counter()
+    assert generator._call_hedged(generator.models, "prompt", {}) == ("model-c", "c")
+    assert time.perf_counter() - start < 1
+    assert list(launches) == ["model-a", "model-b", "model-c"]
+    assert generator.hedged_calls == 0
+
+
+def test_all_models_failing_returns_empty(make_generator, monkeypatch):
+    generator = hedged_generator(make_generator, models=2)
+    stub_models(
+        generator,
+        monkeypatch,
+        {"model-a": (0, None, False), "model-b": (0, None, False)},
+    )
+    assert generator._call_hedged(generator.models, "prompt", {}) == ("", "")
+
+
+def test_hedges_stop_at_max_extra_calls(make_generator, monkeypatch):
+    generator = hedged_generator(make_generator, max_extra_calls=1)
+    launches = stub_models(
+        generator,
+        monkeypatch,
+        {
+            "model-a": (0.4, "a", False),
+            "model-b": (5, "b", False),
+            "model-c": (0.01, "c", False),
+        },
+    )
+    assert generator._call_hedged(generator.models, "prompt", {}) == ("model-a", "a")
+    assert list(launches) == ["model-a", "model-b"]
+    assert launches["model-b"][1].is_set()
+    assert generator.hedged_calls == 1
+
+
+def throttling_generator(make_generator, monkeypatch, outcomes, **rate_limit):
+    generator = make_generator(
+        rate_limit=dict(
+            {
+                "enabled": True,
+                "rpm": 6000,
+                "burst": 10,
+                "backoff": 0.05,
+                "max_concurrency": 4,
+            },
+            **rate_limit,
+        ),
+        health={"enabled": True},
+    )
+    calls = []
+
+    def call_with_format(model_name, prompt, use_message_format, params, **kwargs):
+        calls.append(time.perf_counter())
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if outcome is Throttled:
+            raise Throttled("Throttling.RateQuota - too many requests")
+        return outcome
+
+    monkeypatch.setattr(generator, "_call_with_format", call_with_format)
+    return generator, generator.rate_limiter.get("model-a"), calls
+
+
+def test_throttled_call_backs_off_and_retries(make_generator, monkeypatch):
+    generator, limiter, calls = throttling_generator(
+        make_generator, monkeypatch, [Throttled, (True, "ok")]
+    )
+    assert generator._limited_call("model-a", "prompt", "text", {}) == (True, "ok")
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.04
+    assert limiter.throttled == 1
+    assert limiter.in_flight == 0
+    assert limiter.limit == pytest.approx(2.5)
+
+
+def test_persistent_throttling_skips_model_without_tripping_breaker(
+    make_generator, monkeypatch
+):
+    generator, limiter, calls = throttling_generator(
+        make_generator, monkeypatch, [Throttled], throttle_retries=2
+    )
+    assert generator._try_model("model-a", "prompt", {}) is None
+    assert len(calls) == 3
+    assert limiter.throttled == 3
+    assert limiter.limit == 1.0
+    assert limiter.in_flight == 0
+    assert "model-a" not in generator.health.models
+
+
+def test_cancel_while_backing_off_abandons_model(make_generator, monkeypatch):
+    generator, limiter, calls = throttling_generator(
+        make_generator, monkeypatch, [Throttled, (True, "ok")], backoff=5
+    )
+    cancelled = threading.Event()
+    threading.Timer(0.1, cancelled.set).start()
+    start = time.perf_counter()
+    assert generator._try_model("model-a", "prompt", {}, cancelled=cancelled) is None
+    assert time.perf_counter() - start < 1
+    assert len(calls) == 1
+    assert limiter.in_flight == 0
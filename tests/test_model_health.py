@@ -0,0 +1,142 @@
+import pytest
+
+from model_health import ModelHealth
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def health(tmp_path, clock):
+    return ModelHealth(
+        str(tmp_path / "model_health.json"),
+        failure_threshold=3,
+        cooldown_seconds=600,
+        latency_alpha=0.5,
+        clock=clock,
+    )
+
+
+def test_breaker_opens_after_consecutive_failures(health):
+    for _ in range(2):
+        health.record_failure("qwen-plus")
+    assert health.is_available("qwen-plus")
+
+    health.record_failure("qwen-plus")
+    assert not health.is_available("qwen-plus")
+    assert health.is_available("qwen-max")
+
+
+def test_success_resets_failure_streak(health):
+    health.record_failure("qwen-plus")
+    health.record_failure("qwen-plus")
+    health.record_success("qwen-plus", "message", 1.0)
+    health.record_failure("qwen-plus")
+    health.record_failure("qwen-plus")
+    assert health.is_available("qwen-plus")
+
+
+def test_half_open_after_cooldown_then_closes_on_success(health, clock):
+    for _ in range(3):
+        health.record_failure("qwen-plus")
+
+    clock.now += 599
+    assert not health.is_available("qwen-plus")
+    clock.now += 1
+    assert health.is_available("qwen-plus")
+
+    health.record_success("qwen-plus", "text", 2.0)
+    assert health.models["qwen-plus"]["opened_at"] is None
+    health.record_failure("qwen-plus")
+    assert health.is_available("qwen-plus")
+
+
+def test_half_open_failure_reopens_immediately(health, clock):
+    for _ in range(3):
+        health.record_failure("qwen-plus")
+    clock.now += 600
+    assert health.is_available("qwen-plus")
+
+    health.record_failure("qwen-plus")
+    assert not health.is_available("qwen-plus")
+    clock.now += 599
+    assert not health.is_available("qwen-plus")
+    clock.now += 1
+    assert health.is_available("qwen-plus")
+
+
+def test_ewma_latency(health):
+    health.record_success("qwen-plus", "message", 4.0, ttft=1.0)
+    health.record_success("qwen-plus", "message", 2.0, ttft=None)
+    state = health.models["qwen-plus"]
+    assert state["latency_ewma"] == pytest.approx(3.0)
+    assert state["ttft_ewma"] == pytest.approx(1.0)
+
+
+def test_order_prefers_priority_then_lower_ewma(health):
+    models = [
+        {"name": "slow", "priority": 1},
+        {"name": "fast", "priority": 1},
+        {"name": "unknown", "priority": 1},
+        {"name": "backup", "priority": 2},
+    ]
+    health.record_success("slow", "message", 8.0)
+    health.record_success("fast", "message", 2.0)
+    health.record_success("backup", "message", 0.5)
+    assert [m["name"] for m in health.order(models)] == [
+        "fast",
+        "slow",
+        "unknown",
+        "backup",
+    ]
+
+    for _ in range(4):
+        health.record_success("fast", "message", 20.0)
+    assert [m["name"] for m in health.order(models)][:2] == ["slow", "fast"]
+
+
+def test_formats_prefer_last_good_format(health):
+    assert health.formats("qwen-plus") == ["message", "text"]
+    health.record_success("qwen-plus", "text", 1.0)
+    assert health.formats("qwen-plus") == ["text", "message"]
+
+
+def test_percentile(health):
+    assert health.percentile("qwen-plus", "latency", 90) is None
+    for latency in [5, 1, 4, 2, 3, 10, 6, 8, 7, 9]:
+        health.record_success("qwen-plus", "message", float(latency))
+    assert health.percentile("qwen-plus", "latency", 50) == 6.0
+    assert health.percentile("qwen-plus", "latency", 90) == 10.0
+    assert health.percentile("qwen-plus", "latency", 0) == 1.0
+    assert health.percentile("qwen-plus", "latency", 100) == 10.0
+    assert health.percentile("qwen-plus", "latency", 90, min_samples=11) is None
+    assert health.percentile("qwen-plus", "ttft", 90) is None
+
+
+def test_samples_are_capped(tmp_path, clock):
+    health = ModelHealth(str(tmp_path / "h.json"), max_samples=3, clock=clock)
+    for latency in range(5):
+        health.record_success("qwen-plus", "message", float(latency))
+    assert health.models["qwen-plus"]["latency_samples"] == [2.0, 3.0, 4.0]
+
+
+def test_state_survives_save_and_reload(health, tmp_path, clock):
+    for _ in range(3):
+        health.record_failure("qwen-plus")
+    health.save()
+    reloaded = ModelHealth(
+        str(tmp_path / "model_health.json"), cooldown_seconds=600, clock=clock
+    )
+    assert not reloaded.is_available("qwen-plus")
+    clock.now += 600
+    assert reloaded.is_available("qwen-plus")
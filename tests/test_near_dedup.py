@@ -0,0 +1,122 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from sources.near_dedup import MinHasher, MinHashIndex, NearDuplicateFilter, shingles
+
+with open(os.path.join(FIXTURES_DIR, "near_duplicates.json"), encoding="utf-8") as f:
+    PAIRS = json.load(f)
+
+
+def jaccard(a: str, b: str) -> float:
+    a_shingles, b_shingles = shingles(a), shingles(b)
+    return len(a_shingles & b_shingles) / len(a_shingles | b_shingles)
+
+
+@pytest.fixture
+def dedup(write_config):
+    return NearDuplicateFilter(write_config({"news": {"near_dedup": {}}}))
+
+
+def filter_texts(dedup, texts, scores=None):
+    items = [
+        {"text": text, "quality_score": (scores or {}).get(i, 0)}
+        for i, text in enumerate(texts)
+    ]
+    return dedup.filter(
+        items, text_fn=lambda x: x["text"], score_fn=lambda x: x["quality_score"]
+    )
+
+
+def test_threshold_separates_real_pairs(dedup):
+    duplicates = [jaccard(a, b) for a, b in PAIRS["duplicates"]]
+    distinct = [jaccard(a, b) for a, b in PAIRS["distinct"]]
+    assert min(duplicates) >= dedup.threshold + 0.1
+    assert max(distinct) <= dedup.threshold - 0.1
+
+
+@pytest.mark.parametrize("pair", PAIRS["duplicates"])
+def test_reposts_are_merged(dedup, pair):
+    kept = filter_texts(dedup, pair, scores={1: 5})
+    assert [item["text"] for item in kept] == [pair[1]]
+
+
+@pytest.mark.parametrize("pair", PAIRS["distinct"])
+def test_distinct_stories_are_kept(dedup, pair):
+    assert len(filter_texts(dedup, pair)) == 2
+
+
+def test_band_layout_sits_near_verify_threshold(dedup):
+    index = dedup._new_index()
+    assert index.band_rows == 4
+    assert index.bands == 32
+    assert abs((1 / index.bands) ** (1 / index.band_rows) - dedup.threshold) < 0.05
+
+
+def test_dissimilar_stories_rarely_become_candidates(dedup):
+    texts = list(dict.fromkeys(text for pair in PAIRS["distinct"] for text in pair))
+    similar = {
+        (i, j)
+        for i in range(len(texts))
+        for j in range(i)
+        if jaccard(texts[i], texts[j]) >= dedup.threshold
+    }
+    dissimilar = len(texts) * (len(texts) - 1) // 2 - len(similar)
+
+    hasher, index = dedup.hasher, dedup._new_index()
+    false_candidates = 0
+    for i, text in enumerate(texts):
+        signature = hasher.signature(text)
+        false_candidates += sum(
+            (i, j) not in similar for j in index.candidates(signature)
+        )
+        index.add(signature)
+
+    assert false_candidates <= dissimilar * 0.01
+    assert len(filter_texts(dedup, texts)) == len(texts) - len(similar)
+
+
+def test_every_repost_becomes_a_candidate():
+    hasher = MinHasher()
+    for original, repost in PAIRS["duplicates"]:
+        index = MinHashIndex()
+        index.add(hasher.signature(original))
+        assert index.candidates(hasher.signature(repost)) == [0]
+
+
+def test_single_word_edit_is_duplicate(dedup):
+    text = PAIRS["duplicates"][4][0]
+    assert len(filter_texts(dedup, [text, text.replace("发布", "正式发布", 1)])) == 1
+
+
+def test_mixed_batch_keeps_one_per_story(dedup):
+    texts = [text for pair in PAIRS["duplicates"] for text in pair]
+    assert len(filter_texts(dedup, texts)) == len(PAIRS["duplicates"])
+
+
+def test_filter_does_not_record_history(dedup):
+    filter_texts(dedup, PAIRS["duplicates"][0])
+    assert not os.path.exists(dedup.history_file)
+
+
+def test_history_drops_reposts_of_earlier_pushes(dedup):
+    original, repost = PAIRS["duplicates"][0]
+    pushed = filter_texts(dedup, [original])
+    dedup.remember(pushed)
+    assert filter_texts(dedup, [repost]) != []
+
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    dedup.history = {yesterday: dedup.history.pop(datetime.now().strftime("%Y-%m-%d"))}
+    assert filter_texts(dedup, [repost]) == []
+    assert len(filter_texts(dedup, [PAIRS["distinct"][0][1]])) == 1
+
+
+def test_remember_replaces_history_atomically(dedup):
+    dedup.remember(filter_texts(dedup, PAIRS["duplicates"][0][:1]))
+    assert not os.path.exists(dedup.history_file + ".tmp")
+    with open(dedup.history_file, encoding="utf-8") as f:
+        history = json.load(f)
+    assert len(history[datetime.now().strftime("%Y-%m-%d")]) == 1
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pytest
+
+from sources.paper_index import PaperIndex, tokenize
+from sources.paper_store import PaperStore
+
+# N = 3 documents, lengths 3, 2, 3 -> avgdl = 8/3, k1 = 1.2, b = 0.75
+# idf(lora) = ln(1 + (3 - 2 + 0.5) / (2 + 0.5)) = ln(1.6) = 0.470004
+# d1: tf = 2, K = 1.2 * (0.25 + 0.75 * 3 / (8/3)) = 1.3125
+#     0.470004 * 2 * 2.2 / (2 + 1.3125) = 0.624307
+# d2: tf = 1, K = 1.2 * (0.25 + 0.75 * 2 / (8/3)) = 0.975
+#     0.470004 * 1 * 2.2 / (1 + 0.975) = 0.523548
+# idf(quantization) * 0.5 = 0.5 * ln(1 + 2.5 / 1.5) = 0.490415
+#     d2: 0.490415 * 2.2 / 1.975 = 0.546285
+PAPERS = [
+    ("2501.00001v1", "lora adapters lora", "2025-01-03 00:00:00"),
+    ("2501.00002v1", "lora quantization", "2025-01-02 00:00:00"),
+    ("2501.00003v1", "diffusion images video", "2025-01-01 00:00:00"),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    db_file = str(tmp_path / "papers.db")
+    PaperStore(db_file).upsert_papers(
+        {"arxiv_id": arxiv_id, "title": "", "summary": summary, "published": published}
+        for arxiv_id, summary, published in PAPERS
+    )
+    index = PaperIndex(db_file, k1=1.2, b=0.75)
+    assert index.sync() == 3
+    return index
+
+
+def test_tokenize_drops_stopwords_and_plural_s():
+    assert tokenize("The adapters of LoRA and class") == ["adapter", "lora", "class"]
+
+
+def test_single_term_scores_match_hand_computed_bm25(index):
+    ranked = index.rank([("lora", 1.0)])
+    assert [arxiv_id for arxiv_id, _, _ in ranked] == ["2501.00001", "2501.00002"]
+    assert ranked[0][1] == pytest.approx(0.624307, abs=1e-6)
+    assert ranked[1][1] == pytest.approx(0.523548, abs=1e-6)
+
+
+def test_weighted_terms_add_up_and_report_matches(index):
+    ranked = index.rank([("LoRA", 1.0), ("quantization", 0.5)])
+    assert ranked[0][0] == "2501.00002"
+    assert ranked[0][1] == pytest.approx(0.523548 + 0.546285, abs=1e-6)
+    assert ranked[0][2] == ["lora", "quantization"]
+    assert ranked[1][2] == ["lora"]
+
+
+def test_since_limits_window_without_changing_scores(index):
+    ranked = index.rank([("lora", 1.0)], since=datetime(2025, 1, 3))
+    assert [(arxiv_id, round(score, 6)) for arxiv_id, score, _ in ranked] == [
+        ("2501.00001", 0.624307)
+    ]
+
+
+def test_title_terms_are_boosted(tmp_path):
+    db_file = str(tmp_path / "papers.db")
+    PaperStore(db_file).upsert_papers(
+        [
+            {
+                "arxiv_id": "2501.00001v1",
+                "title": "lora",
+                "summary": "adapter",
+                "published": "2025-01-01 00:00:00",
+            },
+            {
+                "arxiv_id": "2501.00002v1",
+                "title": "adapter",
+                "summary": "lora",
+                "published": "2025-01-01 00:00:00",
+            },
+            {
+                "arxiv_id": "2501.00003v1",
+                "title": "video",
+                "summary": "diffusion",
+                "published": "2025-01-01 00:00:00",
+            },
+        ]
+    )
+    index = PaperIndex(db_file, title_boost=2)
+    index.sync()
+    ranked = index.rank([("lora", 1.0)])
+    assert [arxiv_id for arxiv_id, _, _ in ranked] == ["2501.00001", "2501.00002"]
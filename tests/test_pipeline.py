@@ -0,0 +1,134 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from pipeline import Pipeline, RunCheckpoint
+
+
+def wait_for_checkpoint(checkpoint, stage, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not checkpoint.load(stage)[0] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def make_pipeline(checkpoint, resume, calls, fail=()):
+    def stage(name, value):
+        def run(**inputs):
+            calls.append(name)
+            if name in fail:
+                wait_for_checkpoint(checkpoint, "summary")
+                raise RuntimeError(name)
+            return value(**inputs)
+
+        return run
+
+    pipeline = Pipeline(max_workers=2, checkpoint=checkpoint, resume=resume)
+    pipeline.add("fetch", stage("fetch", lambda: [1, 2, 3]))
+    pipeline.add(
+        "summary",
+        stage("summary", lambda fetch: sum(fetch)),
+        inputs=["fetch"],
+        checkpoint=True,
+    )
+    pipeline.add(
+        "images",
+        stage("images", lambda fetch: []),
+        inputs=["fetch"],
+        checkpoint=True,
+    )
+    pipeline.add(
+        "push",
+        stage("push", lambda summary, images: f"{summary}:{len(images)}"),
+        inputs=["summary", "images"],
+        checkpoint=lambda result: result is not None,
+    )
+    return pipeline
+
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "2025-01-01")
+    assert checkpoint.load("summary") == (False, None)
+    checkpoint.save("summary", {"text": "要闻", "count": 3})
+    assert checkpoint.load("summary") == (True, {"text": "要闻", "count": 3})
+    checkpoint.clear()
+    assert checkpoint.load("summary") == (False, None)
+
+
+def test_checkpoint_prune_removes_old_runs(tmp_path):
+    old = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
+    recent = datetime.now().strftime("%Y-%m-%d")
+    for date_str in (old, recent):
+        RunCheckpoint(str(tmp_path), date_str).save("push", True)
+    RunCheckpoint(str(tmp_path), recent).prune(7)
+    assert os.listdir(tmp_path) == [recent]
+
+
+def test_run_saves_only_checkpointed_truthy_results(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "2025-01-01")
+    calls = []
+    results = make_pipeline(checkpoint, False, calls).run()
+
+    assert results["push"] == "6:0"
+    assert sorted(calls) == ["fetch", "images", "push", "summary"]
+    assert sorted(os.listdir(checkpoint.run_dir)) == ["push.json", "summary.json"]
+
+
+def test_resume_skips_restored_stages_and_unneeded_inputs(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "2025-01-01")
+    calls = []
+    with pytest.raises(RuntimeError):
+        make_pipeline(checkpoint, False, calls, fail={"images"}).run()
+    assert checkpoint.load("summary") == (True, 6)
+
+    calls.clear()
+    pipeline = make_pipeline(checkpoint, True, calls)
+    results = pipeline.run()
+    assert sorted(calls) == ["fetch", "images", "push"]
+    assert results["push"] == "6:0"
+    assert pipeline.stages["summary"].restored
+    assert not pipeline.stages["fetch"].restored
+
+
+def test_resume_prunes_stages_only_needed_by_restored_ones(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "2025-01-01")
+    checkpoint.save("summary", 6)
+    checkpoint.save("images", ["a.png"])
+
+    calls = []
+    pipeline = make_pipeline(checkpoint, True, calls)
+    results = pipeline.run()
+    assert calls == ["push"]
+    assert results["push"] == "6:1"
+    assert "fetch" not in results
+
+
+def test_resume_after_successful_push_runs_nothing(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "2025-01-01")
+    make_pipeline(checkpoint, False, []).run()
+
+    calls = []
+    pipeline = make_pipeline(checkpoint, True, calls)
+    assert pipeline.run()["push"] == "6:0"
+    assert calls == []
+    assert pipeline.report() == "所有需要的阶段均已从检查点恢复"
+
+
+def test_fresh_run_clears_previous_checkpoints(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "2025-01-01")
+    checkpoint.save("summary", 100)
+
+    calls = []
+    results = make_pipeline(checkpoint, False, calls).run()
+    assert "summary" in calls
+    assert results["push"] == "6:0"
+
+
+def test_validate_rejects_unknown_and_cyclic_dependencies():
+    pipeline = Pipeline().add("a", lambda b: b, inputs=["b"])
+    with pytest.raises(ValueError):
+        pipeline.run()
+    pipeline.add("b", lambda a: a, inputs=["a"])
+    with pytest.raises(ValueError):
+        pipeline.run()
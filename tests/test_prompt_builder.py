@@ -0,0 +1,79 @@
+from prompt_builder import PromptBuilder, estimate_tokens, truncate_to_tokens
+
+
+def render(item, limit):
+    return f"{item['title']}\n{truncate_to_tokens(item['body'], limit)}\n"
+
+
+def make_items(count: int, body_tokens: int):
+    return [
+        {"title": f"item{i}", "body": "word " * body_tokens, "score": i}
+        for i in range(count)
+    ]
+
+
+def fit(builder, items, overhead=0, max_item_tokens=None):
+    return builder.fit_items(
+        items,
+        render=render,
+        score_fn=lambda x: x["score"],
+        overhead_tokens=overhead,
+        max_item_tokens=max_item_tokens,
+    )
+
+
+def total_tokens(kept):
+    return sum(estimate_tokens(text) for _, text in kept)
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("大模型") == 3
+    assert estimate_tokens("大模型 abcd") == 5
+
+
+def test_truncate_to_tokens_respects_budget():
+    text = "大模型" * 50 + "tokens " * 50
+    for limit in (1, 10, 100, 200):
+        truncated = truncate_to_tokens(text, limit)
+        assert estimate_tokens(truncated) <= limit + 1
+    assert truncate_to_tokens("short", 10) == "short"
+    assert truncate_to_tokens("short", None) == "short"
+    assert truncate_to_tokens("short", 0) == ""
+
+
+def test_fit_items_keeps_everything_within_budget():
+    items = make_items(4, 20)
+    kept, stats = fit(PromptBuilder(max_input_tokens=1000), items)
+    assert [item for item, _ in kept] == items
+    assert stats == {"total": 4, "kept": 4, "trimmed": 0}
+
+
+def test_fit_items_trims_lowest_scores_first():
+    items = make_items(4, 100)
+    builder = PromptBuilder(max_input_tokens=400, min_item_tokens=30)
+    kept, stats = fit(builder, items, overhead=50)
+
+    assert stats["kept"] == 4
+    assert total_tokens(kept) <= 350
+    texts = {item["score"]: text for item, text in kept}
+    assert texts[3] == render(items[3], None)
+    assert estimate_tokens(texts[0]) < estimate_tokens(texts[3])
+
+
+def test_fit_items_drops_lowest_scores_when_trimming_is_not_enough():
+    items = make_items(5, 100)
+    builder = PromptBuilder(max_input_tokens=120, min_item_tokens=30)
+    kept, stats = fit(builder, items)
+
+    assert total_tokens(kept) <= 120
+    assert [item["score"] for item, _ in kept] == [2, 3, 4]
+    assert stats == {"total": 5, "kept": 3, "trimmed": 5}
+
+
+def test_fit_items_applies_per_item_cap():
+    items = make_items(2, 200)
+    kept, _ = fit(PromptBuilder(max_input_tokens=10000), items, max_item_tokens=50)
+    for _, text in kept:
+        assert estimate_tokens(text) <= 50 + estimate_tokens("item0\n\n") + 1
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+
+import rate_limiter
+from rate_limiter import ModelLimiter, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+def make_limiter(**kwargs) -> ModelLimiter:
+    options = dict(rpm=600, burst=10, max_concurrency=4, backoff=2.0, max_backoff=60)
+    options.update(kwargs)
+    return ModelLimiter(**options)
+
+
+def test_throttle_halves_limit_and_blocks(clock):
+    limiter = make_limiter()
+    assert limiter.acquire()
+    limiter.release("throttled")
+
+    assert limiter.limit == 2.0
+    assert limiter.throttled == 1
+    assert limiter.blocked_until == clock.now + 2.0
+    assert limiter._wait_time(clock.now) == pytest.approx(2.0)
+    assert limiter._wait_time(clock.now + 2.0) == 0.0
+
+
+def test_consecutive_throttles_back_off_exponentially(clock):
+    limiter = make_limiter(max_backoff=5)
+    for expected_limit, expected_delay in ((2.0, 2.0), (1.0, 4.0), (1.0, 5.0)):
+        clock.now = max(clock.now, limiter.blocked_until)
+        assert limiter.acquire()
+        limiter.release("throttled")
+        assert limiter.limit == expected_limit
+        assert limiter.blocked_until == clock.now + expected_delay
+
+
+def test_success_increases_limit_additively(clock):
+    limiter = make_limiter()
+    limiter.limit = 1.0
+    limiter.consecutive_throttles = 2
+
+    limiter.in_flight = 1
+    limiter.release("success")
+    assert limiter.limit == 2.0
+    assert limiter.consecutive_throttles == 0
+
+    limiter.in_flight = 1
+    limiter.release("success")
+    assert limiter.limit == 2.5
+
+    for _ in range(20):
+        limiter.in_flight = 1
+        limiter.release("success")
+    assert limiter.limit == 4.0
+
+
+def test_other_outcomes_leave_limit_unchanged(clock):
+    limiter = make_limiter()
+    assert limiter.acquire()
+    limiter.release("error")
+    assert limiter.limit == 4.0
+    assert limiter.in_flight == 0
+    assert limiter.blocked_until == 0.0
+
+
+def test_acquire_respects_concurrency_limit(clock):
+    limiter = make_limiter()
+    limiter.limit = 2.5
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert limiter._wait_time(clock.now) > 0
+
+    cancelled = threading.Event()
+    cancelled.set()
+    assert not limiter.acquire(cancelled)
+    assert limiter.in_flight == 2
+
+
+def test_acquire_consumes_burst_tokens(clock):
+    limiter = make_limiter(rpm=60, burst=2, max_concurrency=10)
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert limiter._wait_time(clock.now) == pytest.approx(1.0)
+
+    clock.now += 1.0
+    assert limiter.acquire()
+    assert limiter.in_flight == 3
+
+
+def test_rate_limiter_creates_default_limiters():
+    limiter = RateLimiter([{"name": "fast", "max_concurrency": 8}], max_concurrency=2)
+    assert limiter.get("fast").max_concurrency == 8
+    assert limiter.get("other").max_concurrency == 2
+    assert limiter.summary() == ""
+
+    limiter.acquire("other")
+    limiter.release("other", "throttled")
+    assert limiter.summary() == "other: 并发上限 1.0/2, 限流 1 次"
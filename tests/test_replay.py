@@ -0,0 +1,78 @@
+import os
+import time
+from datetime import datetime
+
+import llm_cache
+import metrics
+import model_health
+import replay
+from data_paths import DATA_DIR_ENV, get_data_dir
+from llm_cache import LLMCache
+from sources.seen_store import SeenStore
+
+
+def test_isolated_data_uses_separate_root(tmp_path, write_config):
+    snapshot = tmp_path / "snapshot"
+    snapshot.mkdir()
+    (snapshot / "marker.txt").write_text("recorded", encoding="utf-8")
+    real_entries = sorted(os.listdir(replay.DATA_DIR))
+    config_file = write_config({})
+
+    with replay.isolated_data(str(snapshot)) as data_root:
+        assert os.environ[DATA_DIR_ENV] == data_root
+        assert get_data_dir(replay.PROJECT_DIR) == data_root
+        assert os.listdir(data_root) == ["marker.txt"]
+        store = SeenStore(config_file)
+        assert os.path.dirname(store.db_file) == data_root
+        assert sorted(os.listdir(replay.DATA_DIR)) == real_entries
+
+    assert DATA_DIR_ENV not in os.environ
+    assert not os.path.exists(data_root)
+    assert sorted(os.listdir(replay.DATA_DIR)) == real_entries
+
+
+def test_isolated_data_keeps_run_metrics_out_of_real_data(tmp_path):
+    snapshot = tmp_path / "snapshot"
+    (snapshot / "metrics").mkdir(parents=True)
+    (snapshot / "metrics" / "recorded.json").write_text("{}", encoding="utf-8")
+    real_metrics = os.path.join(replay.DATA_DIR, "metrics")
+    real_entries = (
+        sorted(os.listdir(real_metrics)) if os.path.isdir(real_metrics) else None
+    )
+    archive_metrics = tmp_path / "archive" / "metrics"
+
+    with replay.isolated_data(str(snapshot), str(archive_metrics)) as data_root:
+        assert not os.path.exists(os.path.join(data_root, "metrics"))
+        metrics.start_run("daily_digest")
+        path = metrics.finish_run(
+            os.path.join(get_data_dir(replay.PROJECT_DIR), "metrics")
+        )
+        assert path.startswith(data_root)
+
+    assert os.listdir(archive_metrics) == [os.path.basename(path)]
+    if real_entries is None:
+        assert not os.path.isdir(real_metrics)
+    else:
+        assert sorted(os.listdir(real_metrics)) == real_entries
+
+
+def test_frozen_clock_pins_wall_clock_in_project_modules():
+    recorded_at = time.time() - 30 * 24 * 3600
+    with replay.frozen_clock(recorded_at):
+        assert abs(llm_cache.time.time() - recorded_at) < 5
+        assert abs(model_health.time.time() - recorded_at) < 5
+        assert llm_cache.time.monotonic() > 0
+    assert llm_cache.time is time
+    assert model_health.time is time
+    assert abs(datetime.now().timestamp() - time.time()) < 5
+
+
+def test_frozen_clock_keeps_recorded_cache_entries_fresh(tmp_path):
+    recorded_at = time.time() - 30 * 24 * 3600
+    with replay.frozen_clock(recorded_at):
+        cache = LLMCache(str(tmp_path), ttl_seconds=7 * 24 * 3600)
+        cache.put("key", "response")
+
+    with replay.frozen_clock(recorded_at + 3600):
+        assert LLMCache(str(tmp_path)).get("key") == "response"
+    assert LLMCache(str(tmp_path)).get("key") is None
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from sources import seen_store
+from sources.seen_store import SeenStore
+
+
+class FakeDatetime(datetime):
+    current = datetime(2025, 1, 1, 8, 0, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(seen_store, "datetime", FakeDatetime)
+    FakeDatetime.current = datetime(2025, 1, 1, 8, 0, 0)
+    return FakeDatetime
+
+
+@pytest.fixture
+def config_file(write_config):
+    return write_config({"seen_store": {"retention_days": 30}})
+
+
+NEWS = [
+    {"title": "a", "url": "https://example.com/a", "content_hash": "h1"},
+    {"title": "b", "url": "https://example.com/b", "content_hash": "h2"},
+]
+PAPERS = [{"title": "p", "arxiv_id": "2401.00001v1"}]
+
+
+def test_pushed_items_are_skipped_on_next_run(clock, config_file):
+    SeenStore(config_file).mark_pushed(news=NEWS[:1], papers=PAPERS)
+
+    clock.current += timedelta(days=1)
+    store = SeenStore(config_file)
+    assert store.filter_news(NEWS) == NEWS[1:]
+    assert store.filter_papers([{"arxiv_id": "2401.00001v2"}]) == []
+    assert store.filter_papers([{"arxiv_id": "2401.00002v1"}]) != []
+
+
+def test_news_matches_on_url_or_content_hash(clock, config_file):
+    SeenStore(config_file).mark_pushed(news=NEWS[:1])
+    store = SeenStore(config_file)
+    assert (
+        store.filter_news(
+            [{"url": "https://mirror.example.com/a", "content_hash": "h1"}]
+        )
+        == []
+    )
+    assert (
+        store.filter_news([{"url": "https://example.com/a", "content_hash": "x"}]) == []
+    )
+
+
+def test_items_reappear_after_retention_window(clock, config_file):
+    SeenStore(config_file).mark_pushed(news=NEWS[:1], papers=PAPERS)
+
+    clock.current += timedelta(days=29)
+    assert SeenStore(config_file).filter_news(NEWS[:1]) == []
+
+    clock.current += timedelta(days=2)
+    store = SeenStore(config_file)
+    assert store.filter_news(NEWS[:1]) == NEWS[:1]
+    assert store.filter_papers(PAPERS) == PAPERS
+
+
+def test_mark_pushed_prunes_expired_rows(clock, config_file):
+    SeenStore(config_file).mark_pushed(news=NEWS[:1])
+    clock.current += timedelta(days=31)
+    store = SeenStore(config_file)
+    store.mark_pushed(news=NEWS[1:])
+    assert store._seen_keys(["url:https://example.com/a"]) == set()
+    clock.current -= timedelta(days=31)
+    assert store._seen_keys(["url:https://example.com/a"]) == set()
+
+
+def test_disabled_store_passes_everything(clock, write_config):
+    store = SeenStore(write_config({"seen_store": {"enabled": False}}))
+    store.mark_pushed(news=NEWS)
+    assert store.filter_news(NEWS) == NEWS